@@ -1,85 +1,42 @@
+import os
 import streamlit as st
-from models import Course
+from dotenv import load_dotenv
 from recommender import ClassRecommender
-from chat_interface import ChatInterface
-from datetime import time
+from commute import CommuteModel
+from chat_interface import ChatInterface, ChatSession
+from catalog_store import open_catalog
+from ingest import CatalogIngester
+from main import create_sample_courses
+from instrumentation import profile_request, registry, stage, is_enabled
 
-# Initialize components
-courses = [
-    Course(
-        course_id="CS101",
-        course_name="Introduction to Computer Science",
-        subject="Computer Science",
-        credits=3,
-        professor="Dr. Smith",
-        time_slot=time(9, 0),
-        days=["Monday", "Wednesday"],
-        campus="Main Campus",
-        building="Science Hall",
-        room="101",
-        capacity=30,
-        enrolled=15
-    ),
-    Course(
-        course_id="MATH201",
-        course_name="Calculus II",
-        subject="Mathematics",
-        credits=4,
-        professor="Dr. Johnson",
-        time_slot=time(11, 0),
-        days=["Tuesday", "Thursday"],
-        campus="Main Campus",
-        building="Math Building",
-        room="205",
-        capacity=25,
-        enrolled=20
-    ),
-    Course(
-        course_id="ENG101",
-        course_name="English Composition",
-        subject="English",
-        credits=3,
-        professor="Dr. Williams",
-        time_slot=time(14, 0),
-        days=["Monday", "Wednesday", "Friday"],
-        campus="Main Campus",
-        building="Humanities Hall",
-        room="301",
-        capacity=35,
-        enrolled=25
-    ),
-    Course(
-        course_id="PHYS101",
-        course_name="Physics I",
-        subject="Physics",
-        credits=4,
-        professor="Dr. Brown",
-        time_slot=time(10, 0),
-        days=["Tuesday", "Thursday"],
-        campus="Science Campus",
-        building="Physics Building",
-        room="102",
-        capacity=30,
-        enrolled=18
-    ),
-    Course(
-        course_id="HIST101",
-        course_name="World History",
-        subject="History",
-        credits=3,
-        professor="Dr. Davis",
-        time_slot=time(13, 0),
-        days=["Monday", "Wednesday"],
-        campus="Main Campus",
-        building="History Building",
-        room="201",
-        capacity=40,
-        enrolled=30
-    )
-]
-
-recommender = ClassRecommender(courses)
-chat_interface = ChatInterface()
+load_dotenv()
+
+# A catalog directory (see catalog_store.py) or a registrar export; the sample courses are used when unset
+CATALOG_PATH = os.getenv('CATALOG_PATH')
+# Optional from,to,minutes CSV of travel times between buildings and campuses (see commute.py)
+COMMUTE_PATH = os.getenv('COMMUTE_PATH')
+
+def catalog_version(path: str):
+    """Modification time of the catalog source, so the cached catalog is rebuilt when it changes"""
+    if not path:
+        return None
+    if os.path.isdir(path):
+        path = os.path.join(path, 'meta.json')
+    return os.path.getmtime(path)
+
+# Shared by every user session in this process; version is only part of the cache key
+@st.cache_resource(max_entries=1)
+def load_recommender(path: str, version, commute_path: str, commute_version) -> ClassRecommender:
+    commute = CommuteModel.load(commute_path) if commute_path else None
+    if not path:
+        return ClassRecommender(create_sample_courses(), commute=commute)
+    if os.path.isdir(path):
+        return ClassRecommender.from_catalog(open_catalog(path), commute)
+    return ClassRecommender(list(CatalogIngester().iter_courses(path)), commute=commute)
+
+@st.cache_resource(max_entries=1)
+def load_chat_interface(subjects: tuple, campuses: tuple) -> ChatInterface:
+    return ChatInterface(subjects=list(subjects), campuses=list(campuses))
 
 # Set page config
 st.set_page_config(
@@ -88,6 +45,17 @@ st.set_page_config(
     layout="wide"
 )
 
+# Initialize components
+recommender = load_recommender(CATALOG_PATH, catalog_version(CATALOG_PATH),
+                               COMMUTE_PATH, catalog_version(COMMUTE_PATH))
+chat_interface = load_chat_interface(tuple(recommender.catalog.subjects), tuple(recommender.catalog.campuses))
+
+# Per-user conversation and results survive reruns caused by widget interactions
+if st.session_state.get('chat_session') is None or st.session_state.chat_session.chat_interface is not chat_interface:
+    st.session_state.chat_session = ChatSession(chat_interface)
+    st.session_state.questions = []
+    st.session_state.recommendations = None
+
 # Title and description
 st.title("🎓 AI Class Selection Assistant")
 st.markdown("""
@@ -105,32 +73,50 @@ with col1:
 with col2:
     required_credits = st.number_input("Required Credits:", min_value=1, max_value=24, value=12)
 
+# Opening the app with ?profile=1 captures a cProfile of each request
+profile = st.query_params.get('profile') == '1' or None
+
 if st.button("Get Recommendations"):
     if preferences:
-        # Get preferences from chat interface
-        preferences_dict, questions = chat_interface.chat(preferences)
-        
-        if questions:
-            st.warning("I need some more information:")
-            for question in questions:
-                st.write(question)
-        elif not preferences_dict:
-            st.error("I couldn't understand your preferences. Please try again.")
-        else:
-            # Get recommendations
-            recommendations = recommender.recommend_courses(preferences_dict, required_credits)
-            
-            if recommendations:
-                st.success("Here are your recommended courses:")
-                for course in recommendations:
-                    with st.expander(f"{course.course_name} ({course.course_id})"):
-                        st.write(f"**Time:** {course.time_slot.strftime('%I:%M %p')}")
-                        st.write(f"**Days:** {', '.join(course.days)}")
-                        st.write(f"**Location:** {course.building} {course.room}")
-                        st.write(f"**Professor:** {course.professor}")
-                        st.write(f"**Credits:** {course.credits}")
-                        st.write(f"**Availability:** {course.capacity - course.enrolled}/{course.capacity}")
-            else:
-                st.info("I couldn't find any courses that match your preferences.")
+        with profile_request('recommendation', profile):
+            # Get preferences from the conversation so far
+            preferences_dict, questions = st.session_state.chat_session.send(preferences)
+            st.session_state.questions = questions
+            st.session_state.recommendations = None
+
+            if not questions and preferences_dict:
+                # Get recommendations
+                st.session_state.recommendations = recommender.recommend_courses(preferences_dict, required_credits)
+                st.session_state.chat_session.reset()
     else:
-        st.warning("Please enter your preferences to get recommendations.") 
\ No newline at end of file
+        st.warning("Please enter your preferences to get recommendations.")
+
+questions = st.session_state.questions
+recommendations = st.session_state.recommendations
+
+with stage('render'):
+    if questions:
+        st.warning("I need some more information:")
+        for question in questions:
+            st.write(question)
+    elif recommendations is not None:
+        if recommendations:
+            st.success("Here are your recommended courses:")
+            for course in recommendations:
+                with st.expander(f"{course.course_name} ({course.course_id})"):
+                    display = recommender.catalog.display_of(course)
+                    st.write(f"**Time:** {display.time}")
+                    st.write(f"**Days:** {display.days}")
+                    st.write(f"**Location:** {display.location}")
+                    st.write(f"**Professor:** {course.professor}")
+                    st.write(f"**Credits:** {course.credits}")
+                    st.write(f"**Availability:** {course.capacity - course.enrolled}/{course.capacity}")
+        else:
+            st.info("I couldn't find any courses that match your preferences.")
+
+if is_enabled() or registry.profiles:
+    with st.sidebar.expander("Performance"):
+        st.code(registry.prometheus_text(), language='text')
+        for name, profile_text in reversed(registry.profiles):
+            st.text(f"Profile: {name}")
+            st.code(profile_text, language='text')
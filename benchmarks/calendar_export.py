@@ -0,0 +1,34 @@
+"""Compare per-meeting calendar inserts with batched recurring events against the local stub.
+
+    python -m benchmarks.calendar_export
+"""
+import time
+from calendar_integration import CalendarManager
+from calendar_stub import StubCalendarService
+from main import create_sample_courses
+
+# Typical round-trip time to the Calendar API
+LATENCY = 0.05
+
+
+def run(export):
+    service = StubCalendarService(latency=LATENCY)
+    manager = CalendarManager(service=service)
+    start = time.perf_counter()
+    export(manager)
+    return service.requests, len(service.events_created), time.perf_counter() - start
+
+
+def main():
+    courses = create_sample_courses()
+    results = {
+        "per-meeting inserts": run(lambda m: m.add_schedule_to_calendar(courses, "2024-01-08")),
+        "batched recurring": run(lambda m: m.export_schedule(courses, "2024-01-08")),
+    }
+    print(f"{len(courses)} courses, {LATENCY * 1000:.0f} ms simulated latency per request")
+    for name, (requests, events, seconds) in results.items():
+        print(f"{name:>20}: {requests:4d} requests, {events:4d} events, {seconds:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
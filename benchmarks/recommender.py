@@ -0,0 +1,148 @@
+"""Latency, throughput and memory of the recommender on synthetic catalogs.
+
+Reports p50/p99 latency, throughput and peak traced memory for
+calculate_course_score, check_schedule_conflicts, recommend_courses (without
+the result cache, pruned and full scan), cached recommend_courses lookups and
+get_schedule_summary
+at each catalog size, as JSON for regression tracking.
+
+    python -m benchmarks.recommender --sizes 1000 10000 100000 --output results.json
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, List
+from models import Schedule
+from recommender import ClassRecommender
+from benchmarks.synthetic import campus_names, generate_courses, generate_students, subject_names
+import numpy as np
+
+REQUIRED_CREDITS = 12
+
+
+def measure(operation: Callable[[int], object], calls: int, memory_calls: int) -> dict:
+    """Time operation(i) for i in range(calls), then trace its peak memory over memory_calls more calls.
+
+    Memory is traced in a separate pass because tracemalloc slows down
+    allocation-heavy code and would distort the latencies.
+    """
+    latencies = np.empty(calls)
+    start = time.perf_counter()
+    for i in range(calls):
+        call_start = time.perf_counter()
+        operation(i)
+        latencies[i] = time.perf_counter() - call_start
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for i in range(memory_calls):
+        operation(i)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "calls": calls,
+        "p50_ms": float(np.percentile(latencies, 50)) * 1000,
+        "p99_ms": float(np.percentile(latencies, 99)) * 1000,
+        "mean_ms": float(latencies.mean()) * 1000,
+        "throughput_per_s": calls / elapsed if elapsed else None,
+        "peak_memory_bytes": peak,
+    }
+
+
+def run_size(size: int, calls: int, subjects: int, campuses: int, seed: int) -> List[dict]:
+    courses = generate_courses(size, subjects=subjects, campuses=campuses, seed=seed)
+    students = generate_students(max(calls, 1), subject_names(subjects), campus_names(campuses), seed=seed + 1)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    recommender = ClassRecommender(courses)
+    build_seconds = time.perf_counter() - start
+    _, build_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # recommend_courses is measured without the result cache, cached lookups separately
+    recommender.result_cache = None
+    cached_recommender = ClassRecommender(courses, recommender.catalog)
+
+    rng = random.Random(seed)
+    course_picks = [rng.randrange(size) for _ in range(calls)]
+    schedules = []
+    for i, preferences in enumerate(students[:calls]):
+        recommended = cached_recommender.recommend_courses(preferences, REQUIRED_CREDITS)
+        schedules.append(Schedule(f"student{i}", recommended, sum(c.credits for c in recommended), 0))
+
+    operations = {
+        "calculate_course_score":
+            lambda i: recommender.calculate_course_score(courses[course_picks[i]], students[i]),
+        "check_schedule_conflicts":
+            lambda i: recommender.check_schedule_conflicts(schedules[i], courses[course_picks[i]]),
+        "recommend_courses":
+            lambda i: recommender.recommend_courses(students[i], REQUIRED_CREDITS),
+        "recommend_courses_full_scan":
+            lambda i: recommender.recommend_courses(students[i], REQUIRED_CREDITS, full_scan=True),
+        "recommend_courses_cached":
+            lambda i: cached_recommender.recommend_courses(students[i], REQUIRED_CREDITS),
+        "get_schedule_summary":
+            lambda i: recommender.get_schedule_summary(schedules[i]),
+    }
+
+    results = [{
+        "size": size,
+        "operation": "build",
+        "calls": 1,
+        "seconds": build_seconds,
+        "peak_memory_bytes": build_peak,
+    }]
+    print(f"{size:>7} {'build':>28}: {build_seconds:8.3f} s, peak {build_peak / 1024:8.0f} KiB", file=sys.stderr)
+    for name, operation in operations.items():
+        result = measure(operation, calls, min(calls, 20))
+        results.append({"size": size, "operation": name, **result})
+        print(f"{size:>7} {name:>28}: p50 {result['p50_ms']:8.3f} ms, p99 {result['p99_ms']:8.3f} ms, "
+              f"{result['throughput_per_s']:10.0f}/s, peak {result['peak_memory_bytes'] / 1024:8.0f} KiB",
+              file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--calls', type=int, default=200, help="calls per operation and size")
+    parser.add_argument('--subjects', type=int, default=40)
+    parser.add_argument('--campuses', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "calls": args.calls,
+            "subjects": args.subjects,
+            "campuses": args.campuses,
+        },
+        "results": [
+            result
+            for size in args.sizes
+            for result in run_size(size, args.calls, args.subjects, args.campuses, args.seed)
+        ],
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
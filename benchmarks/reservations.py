@@ -0,0 +1,122 @@
+"""Registration success with and without seat reservations under a multi-threaded load.
+
+Many students with similar preferences ask for recommendations at the same
+time. Without reservations they all get the same popular sections and most
+schedules fail at registration; with reservations each student holds seats
+while reviewing, and later students are steered to sections with seats left.
+
+    python -m benchmarks.reservations
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import time as clock
+from models import Course, StudentPreferences, WEEKDAYS
+from recommender import ClassRecommender
+from reservations import SeatReservations
+
+SECTIONS = 400
+SUBJECTS = ['Computer Science', 'Mathematics', 'Physics', 'English', 'History', 'Biology']
+STUDENTS = 2000
+THREADS = 16
+REQUIRED_CREDITS = 9
+# Times a student asks again when a recommended seat was taken while they were deciding
+MAX_ATTEMPTS = 3
+
+
+def make_courses(seed: int = 0):
+    rng = random.Random(seed)
+    day_patterns = [['Monday', 'Wednesday'], ['Tuesday', 'Thursday'], ['Monday', 'Wednesday', 'Friday']]
+    return [
+        Course(
+            course_id=f"SEC{i:04d}",
+            course_name=f"Section {i}",
+            subject=rng.choice(SUBJECTS),
+            credits=3,
+            professor=f"Professor {i % 50}",
+            time_slot=clock(rng.randint(8, 17), 0),
+            days=rng.choice(day_patterns),
+            campus='Main Campus',
+            building=f"Building {i % 20}",
+            room=str(100 + i % 30),
+            capacity=30,
+            enrolled=rng.randint(0, 20)
+        )
+        for i in range(SECTIONS)
+    ]
+
+
+def make_students(seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        StudentPreferences(
+            max_commute_time=0,
+            preferred_time_slots=[clock(rng.choice([9, 10, 11]), 0)],
+            preferred_days=rng.sample(WEEKDAYS[:5], 2),
+            max_classes_per_day=0,
+            preferred_subjects=rng.sample(SUBJECTS[:3], 2),
+            min_gap_between_classes=0
+        )
+        for _ in range(STUDENTS)
+    ]
+
+
+def run_without_reservations(courses, students):
+    """Recommend concurrently, then register everyone in arrival order"""
+    recommender = ClassRecommender(courses)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(THREADS) as pool:
+        schedules = list(pool.map(lambda p: recommender.recommend_courses(p, REQUIRED_CREDITS), students))
+    elapsed = time.perf_counter() - start
+
+    seats = {course.course_id: course.capacity - course.enrolled for course in courses}
+    registered = 0
+    for schedule in schedules:
+        if schedule and all(seats[course.course_id] > 0 for course in schedule):
+            for course in schedule:
+                seats[course.course_id] -= 1
+            registered += 1
+    return registered, elapsed
+
+
+def run_with_reservations(courses, students):
+    """Recommend and hold seats concurrently, confirming every hold that succeeds"""
+    recommender = ClassRecommender(courses)
+    reservations = SeatReservations(recommender, ttl=60.0)
+    retries = 0
+    lock = threading.Lock()
+
+    def register(i):
+        nonlocal retries
+        for attempt in range(MAX_ATTEMPTS):
+            schedule = recommender.recommend_courses(students[i], REQUIRED_CREDITS)
+            reservation = reservations.hold(f"student{i}", schedule) if schedule else None
+            if reservation is not None:
+                return reservations.confirm(reservation.reservation_id)
+            with lock:
+                retries += 1
+        return False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(THREADS) as pool:
+        registered = sum(pool.map(register, range(len(students))))
+    return registered, time.perf_counter() - start, retries
+
+
+def main():
+    courses = make_courses()
+    students = make_students()
+    seats = sum(course.capacity - course.enrolled for course in courses)
+    print(f"{len(students)} students, {SECTIONS} sections with {seats} open seats, {THREADS} threads")
+
+    registered, elapsed = run_without_reservations(make_courses(), students)
+    print(f"{'without reservations':>22}: {registered:5d} registered, "
+          f"{len(students) / elapsed:8.0f} requests/s")
+    registered, elapsed, retries = run_with_reservations(courses, students)
+    print(f"{'with reservations':>22}: {registered:5d} registered, "
+          f"{len(students) / elapsed:8.0f} requests/s, {retries} retries")
+
+
+if __name__ == "__main__":
+    main()
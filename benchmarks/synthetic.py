@@ -0,0 +1,126 @@
+"""Seeded synthetic catalogs and student populations for benchmarks.
+
+The same seed always gives the same courses and students, so results from
+different runs and machines can be compared.
+"""
+import random
+from datetime import time
+from typing import List, Optional, Sequence
+from models import ClassMeeting, Course, StudentPreferences, WEEKDAYS
+
+SUBJECT_NAMES = ['Computer Science', 'Mathematics', 'Physics', 'Chemistry', 'Biology', 'English', 'History',
+                 'Economics', 'Psychology', 'Philosophy', 'Sociology', 'Political Science', 'Art History',
+                 'Music', 'Statistics', 'Linguistics', 'Geology', 'Anthropology', 'Spanish', 'French']
+
+# (days, length in minutes, share of sections); length None is the 1-hour default without explicit meetings
+MEETING_PATTERNS = [
+    (['Monday', 'Wednesday', 'Friday'], 50, 0.35),
+    (['Tuesday', 'Thursday'], 75, 0.30),
+    (['Monday', 'Wednesday'], None, 0.15),
+    (['Wednesday'], 170, 0.08),
+    (['Tuesday', 'Thursday'], 'lab', 0.12),  # 75-minute lectures plus a 110-minute Friday lab
+]
+
+CAPACITIES = [20, 25, 30, 40, 60, 120, 250]
+
+
+def subject_names(count: int) -> List[str]:
+    """The first count subject names, numbered once the list runs out"""
+    n = len(SUBJECT_NAMES)
+    return [SUBJECT_NAMES[i] if i < n else f"{SUBJECT_NAMES[i % n]} {i // n + 1}" for i in range(count)]
+
+
+def campus_names(count: int) -> List[str]:
+    return ['Main Campus'] + [f"Campus {chr(ord('A') + i)}" for i in range(count - 1)]
+
+
+def _zipf_weights(count: int, exponent: float = 1.0) -> List[float]:
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+def _minutes(minute: int) -> time:
+    return time(minute // 60, minute % 60)
+
+
+def generate_courses(sections: int, subjects: int = 40, campuses: int = 3, buildings_per_campus: int = 12,
+                     seed: int = 0) -> List[Course]:
+    """Generate a catalog of sections with realistic skew.
+
+    Subject sizes and enrollment follow Zipf-like popularity, start times
+    cluster in the late morning, and meeting patterns mix MWF 50-minute,
+    TTh 75-minute, weekly 170-minute and lecture-plus-lab sections.
+    """
+    rng = random.Random(seed)
+    subject_list = subject_names(subjects)
+    subject_weights = _zipf_weights(subjects)
+    campus_list = campus_names(campuses)
+    patterns = [pattern[:2] for pattern in MEETING_PATTERNS]
+    pattern_weights = [pattern[2] for pattern in MEETING_PATTERNS]
+    # Half-hour start times from 8:00 to 19:00, most popular around 10:00
+    starts = list(range(8 * 60, 19 * 60 + 1, 30))
+    start_weights = [1 / (1 + abs(start - 10 * 60) / 120) for start in starts]
+
+    courses = []
+    for i in range(sections):
+        subject_rank = rng.choices(range(subjects), subject_weights)[0]
+        subject = subject_list[subject_rank]
+        campus = campus_list[0] if rng.random() < 0.6 else rng.choice(campus_list)
+        building = f"{campus} Hall {rng.randrange(buildings_per_campus) + 1}"
+        days, length = rng.choices(patterns, pattern_weights)[0]
+        start = rng.choices(starts, start_weights)[0]
+
+        meetings = []
+        credits = 3
+        if length == 'lab':
+            meetings = [ClassMeeting(day, _minutes(start), _minutes(start + 75)) for day in days]
+            lab_start = rng.choice([13 * 60, 14 * 60, 15 * 60])
+            meetings.append(ClassMeeting('Friday', _minutes(lab_start), _minutes(lab_start + 110)))
+            days = days + ['Friday']
+            credits = 4
+        elif length is not None:
+            meetings = [ClassMeeting(day, _minutes(start), _minutes(start + length)) for day in days]
+
+        capacity = rng.choice(CAPACITIES)
+        # Popular subjects fill up: the expected fill ratio falls from 0.8 to 0.5 with subject rank
+        popularity = 1 - subject_rank / max(subjects - 1, 1)
+        fill = min(rng.betavariate(2 + 6 * popularity, 2), 1.0)
+        courses.append(Course(
+            course_id=f"{subject[:4].upper().replace(' ', '')}{i:06d}",
+            course_name=f"{subject} {100 + i % 400}",
+            subject=subject,
+            credits=credits,
+            professor=f"Dr. {rng.randrange(max(sections // 4, 1))}",
+            time_slot=_minutes(start),
+            days=days,
+            campus=campus,
+            building=building,
+            room=str(100 + rng.randrange(300)),
+            capacity=capacity,
+            enrolled=int(capacity * fill),
+            meetings=meetings
+        ))
+    return courses
+
+
+def generate_students(count: int, subjects: Sequence[str], campuses: Optional[Sequence[str]] = None,
+                      seed: int = 0) -> List[StudentPreferences]:
+    """Generate student preferences, favouring the most popular (first) subjects"""
+    rng = random.Random(seed)
+    subject_weights = _zipf_weights(len(subjects))
+    campuses = list(campuses or [])
+    times = [time(hour, 0) for hour in range(8, 19)]
+    time_weights = [1 / (1 + abs(hour - 10)) for hour in range(8, 19)]
+
+    students = []
+    for _ in range(count):
+        preferred_subjects = list(dict.fromkeys(rng.choices(subjects, subject_weights, k=rng.randint(1, 3))))
+        students.append(StudentPreferences(
+            max_commute_time=rng.choice([0, 20, 30, 45, 60]),
+            preferred_time_slots=sorted(set(rng.choices(times, time_weights, k=rng.randint(1, 3)))),
+            preferred_days=rng.sample(WEEKDAYS[:5], rng.randint(2, 4)),
+            max_classes_per_day=rng.choice([0, 2, 3, 4]),
+            preferred_subjects=preferred_subjects,
+            min_gap_between_classes=rng.choice([0, 10, 15, 30]),
+            preferred_campus=rng.choice(campuses) if campuses and rng.random() < 0.5 else None
+        ))
+    return students
@@ -1,21 +1,28 @@
 import os
 from datetime import datetime, timedelta
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 import pickle
-from models import Course
+from typing import List, Optional, Tuple
+from models import Course, WEEKDAYS, meetings_of
+from instrumentation import timed
+
+RRULE_DAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
 
 class CalendarManager:
-    def __init__(self):
+    def __init__(self, service=None):
         self.SCOPES = ['https://www.googleapis.com/auth/calendar']
         self.creds = None
-        self.service = None
-        self.initialize_service()
+        self.service = service
+        # An already built service (or a local stub) skips authentication
+        if self.service is None:
+            self.initialize_service()
 
     def initialize_service(self):
         """Initialize the Google Calendar service with proper authentication"""
+        # Imported here so a stub service works without the Google client libraries installed
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from google.auth.transport.requests import Request
+        from googleapiclient.discovery import build
+
         # The file token.pickle stores the user's access and refresh tokens
         if os.path.exists('token.pickle'):
             with open('token.pickle', 'rb') as token:
@@ -41,11 +48,11 @@ class CalendarManager:
         # Convert semester start date to datetime object
         start_date = datetime.strptime(semester_start_date, '%Y-%m-%d')
         
-        # Find the first occurrence of each day in the course schedule
+        # Find the first occurrence of each meeting in the course schedule
         events = []
-        for day in course.days:
+        for meeting in meetings_of(course):
             # Convert day name to number (Monday = 0, Sunday = 6)
-            day_num = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'].index(day)
+            day_num = WEEKDAYS.index(meeting.day)
             
             # Calculate the date of the first class
             days_to_add = (day_num - start_date.weekday()) % 7
@@ -56,29 +63,10 @@ class CalendarManager:
                 class_date = first_class_date + timedelta(weeks=week)
                 
                 # Create start and end times
-                start_time = datetime.combine(class_date, course.time_slot)
-                end_time = start_time + timedelta(hours=1)  # Assuming 1-hour classes
+                start_time = datetime.combine(class_date, meeting.start_time)
+                end_time = datetime.combine(class_date, meeting.end_time)
                 
-                event = {
-                    'summary': f'{course.course_name} ({course.course_id})',
-                    'location': f'{course.building} {course.room}',
-                    'description': f'Professor: {course.professor}\nSubject: {course.subject}\nCredits: {course.credits}',
-                    'start': {
-                        'dateTime': start_time.isoformat(),
-                        'timeZone': 'America/New_York',  # Adjust timezone as needed
-                    },
-                    'end': {
-                        'dateTime': end_time.isoformat(),
-                        'timeZone': 'America/New_York',
-                    },
-                    'recurrence': [],  # No recurrence as we're creating individual events
-                    'reminders': {
-                        'useDefault': False,
-                        'overrides': [
-                            {'method': 'popup', 'minutes': 30},
-                        ],
-                    },
-                }
+                event = self._event_body(course, start_time, end_time)
                 
                 try:
                     event = self.service.events().insert(calendarId='primary', body=event).execute()
@@ -89,6 +77,93 @@ class CalendarManager:
         
         return events
 
+    def _event_body(self, course: Course, start_time: datetime, end_time: datetime,
+                    recurrence: Optional[List[str]] = None, time_zone: str = 'America/New_York') -> dict:
+        """Build the Calendar API event resource for a class meeting"""
+        return {
+            'summary': f'{course.course_name} ({course.course_id})',
+            'location': f'{course.building} {course.room}',
+            'description': f'Professor: {course.professor}\nSubject: {course.subject}\nCredits: {course.credits}',
+            'start': {
+                'dateTime': start_time.isoformat(),
+                'timeZone': time_zone,  # Adjust timezone as needed
+            },
+            'end': {
+                'dateTime': end_time.isoformat(),
+                'timeZone': time_zone,
+            },
+            'recurrence': recurrence or [],
+            'reminders': {
+                'useDefault': False,
+                'overrides': [
+                    {'method': 'popup', 'minutes': 30},
+                ],
+            },
+        }
+
+    def build_recurring_events(self, course: Course, semester_start_date: str, weeks: int = 16,
+                               time_zone: str = 'America/New_York') -> List[dict]:
+        """Build weekly-recurring events covering every meeting of a course in the semester.
+
+        Meetings with the same start and end time share one event, so a
+        lecture on several days and a lab at another time give two events.
+        """
+        start_date = datetime.strptime(semester_start_date, '%Y-%m-%d')
+        patterns = {}
+        for meeting in meetings_of(course):
+            if meeting.day in WEEKDAYS:
+                patterns.setdefault((meeting.start_time, meeting.end_time), set()).add(WEEKDAYS.index(meeting.day))
+
+        events = []
+        for (start, end), day_nums in patterns.items():
+            day_nums = sorted(day_nums)
+            # The first meeting on or after the semester start anchors the series
+            first_class_date = min(start_date + timedelta(days=(day_num - start_date.weekday()) % 7) for day_num in day_nums)
+            start_time = datetime.combine(first_class_date, start)
+            end_time = datetime.combine(first_class_date, end)
+            # Same meetings as the per-week expansion: each class day once a week for the given number of weeks
+            by_day = ','.join(RRULE_DAYS[day_num] for day_num in day_nums)
+            recurrence = [f'RRULE:FREQ=WEEKLY;BYDAY={by_day};COUNT={weeks * len(day_nums)}']
+            events.append(self._event_body(course, start_time, end_time, recurrence, time_zone))
+        return events
+
+    @timed('calendar_export')
+    def export_schedule(self, courses: list[Course], semester_start_date: str, weeks: int = 16,
+                        batch_size: int = 50) -> Tuple[List[dict], List[Tuple[str, str]]]:
+        """Add a schedule to the calendar with recurring events for each course, sent in batch requests.
+
+        Returns the created events and a (course_id, error) pair for every
+        course whose event could not be created. A batch that fails as a whole
+        fails every course in it without losing events from earlier batches.
+        """
+        created = []
+        failures = []
+        events = []
+        for course in courses:
+            course_events = self.build_recurring_events(course, semester_start_date, weeks)
+            if not course_events:
+                failures.append((course.course_id, 'Course has no valid meeting days'))
+            events.extend((course, event) for event in course_events)
+
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                failures.append((events[int(request_id)][0].course_id, str(exception)))
+            else:
+                created.append(response)
+
+        for start in range(0, len(events), batch_size):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for i in range(start, min(start + batch_size, len(events))):
+                batch.add(self.service.events().insert(calendarId='primary', body=events[i][1]), request_id=str(i))
+            try:
+                batch.execute()
+            except Exception as e:
+                # Keep what earlier batches created; report every course in this one
+                batch_courses = dict.fromkeys(course.course_id for course, _ in events[start:start + batch_size])
+                failures.extend((course_id, str(e)) for course_id in batch_courses)
+        return created, failures
+
+    @timed('calendar_export')
     def add_schedule_to_calendar(self, courses: list[Course], semester_start_date: str):
         """Add all courses in a schedule to the calendar"""
         all_events = []
@@ -0,0 +1,83 @@
+import time
+from typing import Callable, List, Optional
+
+
+class StubHttpError(Exception):
+    """Stands in for googleapiclient.errors.HttpError in the local stub"""
+
+
+class StubCalendarService:
+    """Offline stand-in for the Google Calendar discovery service.
+
+    Supports the calls CalendarManager makes (events().insert(...).execute()
+    and new_batch_http_request()), counts HTTP round trips and simulates a
+    fixed latency per round trip. Events whose summary matches should_fail
+    are rejected with a StubHttpError.
+    """
+
+    def __init__(self, latency: float = 0.0, should_fail: Optional[Callable[[dict], bool]] = None):
+        self.latency = latency
+        self.should_fail = should_fail
+        self.requests = 0
+        self.events_created: List[dict] = []
+
+    def events(self) -> '_StubEvents':
+        return _StubEvents(self)
+
+    def new_batch_http_request(self, callback=None) -> '_StubBatch':
+        return _StubBatch(self, callback)
+
+    def _round_trip(self):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _create(self, body: dict) -> dict:
+        if self.should_fail and self.should_fail(body):
+            raise StubHttpError(f"Invalid event: {body.get('summary')}")
+        event = dict(body, id=f"event{len(self.events_created)}",
+                     htmlLink=f"https://calendar.invalid/event{len(self.events_created)}")
+        self.events_created.append(event)
+        return event
+
+
+class _StubEvents:
+    def __init__(self, service: StubCalendarService):
+        self.service = service
+
+    def insert(self, calendarId: str, body: dict) -> '_StubRequest':
+        return _StubRequest(self.service, body)
+
+
+class _StubRequest:
+    def __init__(self, service: StubCalendarService, body: dict):
+        self.service = service
+        self.body = body
+
+    def execute(self) -> dict:
+        self.service._round_trip()
+        return self.service._create(self.body)
+
+
+class _StubBatch:
+    """Sends all added requests in a single round trip, like BatchHttpRequest"""
+
+    def __init__(self, service: StubCalendarService, callback=None):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request: _StubRequest, callback=None, request_id: Optional[str] = None):
+        if request_id is None:
+            request_id = str(len(self.requests))
+        self.requests.append((request_id, request, callback or self.callback))
+
+    def execute(self):
+        self.service._round_trip()
+        for request_id, request, callback in self.requests:
+            try:
+                response, exception = self.service._create(request.body), None
+            except StubHttpError as e:
+                response, exception = None, e
+            if callback is not None:
+                callback(request_id, response, exception)
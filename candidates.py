@@ -0,0 +1,79 @@
+from typing import Iterator
+from models import StudentPreferences
+from catalog import CourseCatalog
+import numpy as np
+
+
+class CandidateIndex:
+    """Inverted index from subject, campus, meeting days and start minute to catalog rows.
+
+    Courses sharing all four fall in one cell and earn the same points from
+    any student's preferences, so a cell's points plus the best availability
+    among its courses bound the score of every course in it. ranked_rows
+    scores the cells, then only the courses of cells whose bound is still in
+    reach, so a request scores the slice of the catalog that can matter to
+    it instead of every course.
+    """
+
+    def __init__(self, catalog: CourseCatalog):
+        self.catalog = catalog
+        columns = (catalog.subject_codes, catalog.campus_codes, catalog.day_masks, catalog.time_codes)
+        # Stable, so the rows of a cell stay in catalog order
+        self.rows = np.lexsort(columns[::-1])
+        changed = np.zeros(len(self.rows), dtype=bool)
+        changed[:1] = True
+        for column in columns:
+            ordered = column[self.rows]
+            changed[1:] |= ordered[1:] != ordered[:-1]
+        # Where each cell's rows begin and end in self.rows
+        self.starts = np.flatnonzero(changed)
+        # Cell of every catalog row
+        self.cell_of = np.empty(len(self.rows), dtype=np.int64)
+        self.cell_of[self.rows] = np.cumsum(changed) - 1
+        self.ends = np.append(self.starts[1:], len(self.rows))
+        self.cell_rows = self.rows[self.starts]
+        self._best_availability = (None, None)
+
+    def best_availability(self) -> np.ndarray:
+        """Highest availability among the courses of each cell, recomputed once per catalog version"""
+        version, best = self._best_availability
+        if version != self.catalog.version:
+            # Read first, so a change made while computing is picked up by the next call
+            version = self.catalog.version
+            best = (np.maximum.reduceat(self.catalog.availability(self.rows), self.starts)
+                    if len(self.starts) else np.empty(0))
+            self._best_availability = (version, best)
+        return best
+
+    def cells_reaching(self, preferences: StudentPreferences, floor: float) -> np.ndarray:
+        """Cells with a course that scores floor or more at full availability"""
+        return np.flatnonzero(self.catalog.preference_points(preferences, self.cell_rows) + 2.0 >= floor)
+
+    def ranked_rows(self, preferences: StudentPreferences, first_batch: int = 16) -> Iterator[int]:
+        """Yield catalog rows in the order iter_ranked gives for CourseCatalog.score over the whole catalog.
+
+        Cells are taken best bound first, in batches that double in size, and
+        a scored course is yielded once no cell left can hold a course scoring
+        above it. A consumer that stops early leaves most of the catalog unscored.
+        """
+        bounds = self.catalog.preference_points(preferences, self.cell_rows) + self.best_availability() * 2.0
+        cells = np.argsort(-bounds, kind='stable')
+        pending_rows = np.empty(0, dtype=np.int64)
+        pending_scores = np.empty(0)
+        taken = 0
+        batch = first_batch
+        while taken < len(cells):
+            rows = np.concatenate([self.rows[self.starts[cell]:self.ends[cell]]
+                                   for cell in cells[taken:taken + batch].tolist()])
+            taken += batch
+            batch *= 2
+            # Every course in a cell not taken yet scores at most this
+            floor = bounds[cells[taken]] if taken < len(cells) else -np.inf
+
+            pending_rows = np.concatenate((pending_rows, rows))
+            pending_scores = np.concatenate((pending_scores, self.catalog.score(preferences, rows)))
+            ready = pending_scores > floor
+            # Best score first, ties in catalog order
+            order = np.lexsort((pending_rows[ready], -pending_scores[ready]))
+            yield from pending_rows[ready][order].tolist()
+            pending_rows, pending_scores = pending_rows[~ready], pending_scores[~ready]
@@ -0,0 +1,443 @@
+import threading
+from collections import deque
+from collections.abc import Sequence
+from dataclasses import FrozenInstanceError
+from datetime import time
+from typing import Callable, Dict, List, Optional, Tuple
+from models import Course, ClassMeeting, CourseDisplay, StudentPreferences, WEEKDAYS, DEFAULT_CLASS_MINUTES, meetings_of
+from constraints import Meeting
+from instrumentation import count, timed
+import numpy as np
+
+# Weekly occupancy grid: each weekday is split into fixed-size slots, one bit per slot
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+# Serializes version bumps from request, reservation and enrollment feed threads (module level, so
+# catalogs stay picklable)
+_version_lock = threading.Lock()
+
+# Versions whose changed rows are remembered for caches catching up (see changes_since)
+CHANGE_LOG_SIZE = 4096
+
+# Number of set bits for every possible 7-day mask
+_POPCOUNT = np.array([bin(mask).count('1') for mask in range(1 << len(WEEKDAYS))], dtype=np.int8)
+
+
+def day_mask(days: List[str]) -> int:
+    """Convert a list of day names into a weekday bitmask (Monday = bit 0)"""
+    mask = 0
+    for day in days:
+        if day in WEEKDAYS:
+            mask |= 1 << WEEKDAYS.index(day)
+    return mask
+
+
+def slot_mask(start_minute: int, days: int, duration: int = DEFAULT_CLASS_MINUTES) -> int:
+    """Bitmask of the weekly time slots taken by a class starting at start_minute on the given weekday mask.
+
+    Start times are rounded down and end times up to the slot grid, and a
+    class running past midnight is cut off at the end of its day.
+    """
+    first = start_minute // SLOT_MINUTES
+    last = min(-(-(start_minute + duration) // SLOT_MINUTES), SLOTS_PER_DAY)
+    slots = ((1 << max(last - first, 0)) - 1) << first
+
+    mask = 0
+    for day in range(len(WEEKDAYS)):
+        if days & (1 << day):
+            mask |= slots << (day * SLOTS_PER_DAY)
+    return mask
+
+
+def slot_meetings(start_minute: int, days: int, duration: int = DEFAULT_CLASS_MINUTES) -> List[Meeting]:
+    """List the weekly (day, start, end) meetings in minutes for a start time and weekday mask"""
+    return [
+        (day, start_minute, start_minute + duration)
+        for day in range(len(WEEKDAYS))
+        if days & (1 << day)
+    ]
+
+
+def meetings_mask(meetings: List[Meeting]) -> int:
+    """Bitmask of the weekly time slots taken by a list of (day, start, end) meetings"""
+    mask = 0
+    for day, start, end in meetings:
+        mask |= slot_mask(start, 1 << day, end - start)
+    return mask
+
+
+def _minutes(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+
+def _time_of(minute: int) -> time:
+    """Inverse of _minutes, with times past midnight cut off at 23:59"""
+    minute = min(minute, 24 * 60 - 1)
+    return time(minute // 60, minute % 60)
+
+
+def course_meetings(course: Course) -> List[Meeting]:
+    """List the weekly (day, start, end) meetings of a course in minutes"""
+    return [
+        (WEEKDAYS.index(meeting.day), _minutes(meeting.start_time), _minutes(meeting.end_time))
+        for meeting in meetings_of(course)
+        if meeting.day in WEEKDAYS
+    ]
+
+
+def weekly_mask(course: Course) -> int:
+    """Bitmask of the weekly time slots a course occupies"""
+    return meetings_mask(course_meetings(course))
+
+
+def meeting_columns(course: Course) -> Tuple[int, int, int, Optional[List[Meeting]]]:
+    """Columnar encoding of a course's meetings: (start minute, day mask, duration, irregular meetings).
+
+    Most sections meet at the same time for the same length on each of their
+    days, which start, day mask and duration describe exactly. Anything else
+    (labs at other times, different lengths per day) also returns the full
+    meeting list, and the day mask covers every day the course meets.
+    """
+    start = _minutes(course.time_slot)
+    meetings = sorted(course_meetings(course))
+    days = 0
+    for day, _, _ in meetings:
+        days |= 1 << day
+    duration = meetings[0][2] - meetings[0][1] if meetings else DEFAULT_CLASS_MINUTES
+    irregular = None if meetings == slot_meetings(start, days, duration) else meetings
+    return start, days, duration, irregular
+
+
+class LazyColumn(Sequence):
+    """Per-course values computed on first access and cached"""
+
+    def __init__(self, size: int, compute: Callable[[int], object]):
+        self._values = [None] * size
+        self._compute = compute
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __getitem__(self, i):
+        value = self._values[i]
+        if value is None:
+            value = self._values[i] = self._compute(i)
+        return value
+
+    def cached(self, i):
+        """The value at i if it has been computed, else None"""
+        return self._values[i]
+
+
+class CourseCatalog:
+    """Columnar view of the available courses used for vectorized scoring"""
+
+    def __init__(self, courses: Sequence[Course]):
+        self.courses = courses
+        self.subjects: List[str] = []
+        self.campuses: List[str] = []
+        self.buildings: List[str] = []
+        self.subject_index: Dict[str, int] = {}
+        self.campus_index: Dict[str, int] = {}
+        self.building_index: Dict[str, int] = {}
+        # Meetings of the few sections that start, day mask and duration can't describe
+        self.irregular_meetings: Dict[int, List[Meeting]] = {}
+
+        n = len(courses)
+        self.subject_codes = np.empty(n, dtype=np.int32)
+        self.campus_codes = np.empty(n, dtype=np.int32)
+        self.building_codes = np.empty(n, dtype=np.int32)
+        self.start_minutes = np.empty(n, dtype=np.int32)
+        self.day_masks = np.empty(n, dtype=np.uint8)
+        self.durations = np.empty(n, dtype=np.int16)
+        self.capacity = np.empty(n, dtype=np.int32)
+        self.enrolled = np.empty(n, dtype=np.int32)
+        self.credits = np.empty(n, dtype=np.int32)
+
+        for i, course in enumerate(courses):
+            self.subject_codes[i] = self._intern(course.subject, self.subjects, self.subject_index)
+            self.campus_codes[i] = self._intern(course.campus, self.campuses, self.campus_index)
+            self.building_codes[i] = self._intern(course.building, self.buildings, self.building_index)
+            start, days, duration, irregular = meeting_columns(course)
+            self.start_minutes[i] = start
+            self.day_masks[i] = days
+            self.durations[i] = duration
+            if irregular is not None:
+                self.irregular_meetings[i] = irregular
+            self.capacity[i] = course.capacity
+            self.enrolled[i] = course.enrolled
+            self.credits[i] = course.credits
+
+        self._index_by_id = {id(course): i for i, course in enumerate(courses)}
+        self._row_by_course_id = None
+        self._build_derived()
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray], strings: Dict[str, Sequence[str]],
+                     meetings: Optional[np.ndarray] = None) -> 'CourseCatalog':
+        """Build a catalog directly from column arrays (possibly memory-mapped) and their string tables.
+
+        String fields are stored as <field>_codes columns indexing into
+        strings[<field>], and Course objects are only created when accessed.
+        Irregular meeting patterns are given as (row, day, start, end) rows
+        in meetings, and a missing durations column means 1-hour classes.
+        """
+        catalog = cls.__new__(cls)
+        catalog.subject_codes = columns['subject_codes']
+        catalog.campus_codes = columns['campus_codes']
+        catalog.building_codes = columns['building_codes']
+        catalog.start_minutes = columns['start_minutes']
+        catalog.day_masks = columns['day_masks']
+        catalog.durations = columns.get('durations')
+        if catalog.durations is None:
+            catalog.durations = np.full(len(catalog.day_masks), DEFAULT_CLASS_MINUTES, dtype=np.int16)
+        catalog.irregular_meetings = {}
+        for row, day, start, end in (meetings.tolist() if meetings is not None else []):
+            catalog.irregular_meetings.setdefault(row, []).append((day, start, end))
+        catalog.capacity = columns['capacity']
+        # Enrollment is the only column that changes at runtime, so keep a private copy
+        catalog.enrolled = np.array(columns['enrolled'])
+        catalog.credits = columns['credits']
+        catalog._columns = columns
+        catalog._strings = strings
+
+        catalog.subjects = [str(s) for s in strings['subject']]
+        catalog.campuses = [str(s) for s in strings['campus']]
+        catalog.buildings = [str(s) for s in strings['building']]
+        catalog.subject_index = {s: code for code, s in enumerate(catalog.subjects)}
+        catalog.campus_index = {s: code for code, s in enumerate(catalog.campuses)}
+        catalog.building_index = {s: code for code, s in enumerate(catalog.buildings)}
+
+        catalog.courses = LazyColumn(len(catalog.subject_codes), catalog._materialize)
+        catalog._index_by_id = {}
+        catalog._row_by_course_id = None
+        catalog._build_derived()
+        return catalog
+
+    def _build_derived(self):
+        """Set up the columns derived from the stored ones"""
+        self.day_counts = _POPCOUNT[self.day_masks]
+        # Bumped when enrollment or held seats change, so results computed from the catalog can tell they are stale
+        self.version = 0
+        self._changes = deque(maxlen=CHANGE_LOG_SIZE)  # (version, rows changed by it)
+        # Seats tentatively held per course (see reservations.py), counted as taken when set
+        self.held: Optional[np.ndarray] = None
+        self.time_values, self.time_codes = np.unique(self.start_minutes, return_inverse=True)
+        self._time_index = {int(minute): code for code, minute in enumerate(self.time_values)}
+        # Python ints, since a week of slots does not fit in a fixed-width dtype
+        self.time_masks = LazyColumn(len(self.day_masks), self._time_mask_at)
+        self.meetings = LazyColumn(len(self.day_masks), self._meetings_at)
+        # Formatted display fields; don't depend on enrollment, so they stay valid for the catalog's lifetime
+        self.display = LazyColumn(len(self.day_masks), self._display_at)
+
+    def _time_mask_at(self, i: int) -> int:
+        irregular = self.irregular_meetings.get(i)
+        if irregular is not None:
+            return meetings_mask(irregular)
+        return slot_mask(int(self.start_minutes[i]), int(self.day_masks[i]), int(self.durations[i]))
+
+    def _meetings_at(self, i: int) -> List[Meeting]:
+        irregular = self.irregular_meetings.get(i)
+        if irregular is not None:
+            return irregular
+        return slot_meetings(int(self.start_minutes[i]), int(self.day_masks[i]), int(self.durations[i]))
+
+    def _display_at(self, i: int) -> CourseDisplay:
+        return CourseDisplay.of(self.courses[i])
+
+    def _string(self, field: str, i: int) -> str:
+        return str(self._strings[field][self._columns[field + '_codes'][i]])
+
+    def _materialize(self, i: int) -> Course:
+        """Create the Course object for row i of a column-backed catalog"""
+        minute = int(self.start_minutes[i])
+        days = int(self.day_masks[i])
+        meetings = []
+        if i in self.irregular_meetings or self.durations[i] != DEFAULT_CLASS_MINUTES:
+            meetings = [
+                ClassMeeting(WEEKDAYS[day], _time_of(start), _time_of(end))
+                for day, start, end in self._meetings_at(i)
+            ]
+        course = Course(
+            course_id=self._string('course_id', i),
+            course_name=self._string('course_name', i),
+            subject=self.subjects[self.subject_codes[i]],
+            credits=int(self.credits[i]),
+            professor=self._string('professor', i),
+            time_slot=_time_of(minute),
+            days=[day for bit, day in enumerate(WEEKDAYS) if days & (1 << bit)],
+            campus=self.campuses[self.campus_codes[i]],
+            building=self.buildings[self.building_codes[i]],
+            room=self._string('room', i),
+            capacity=int(self.capacity[i]),
+            enrolled=int(self.enrolled[i]),
+            meetings=meetings
+        )
+        self._index_by_id[id(course)] = i
+        return course
+
+    def __len__(self) -> int:
+        return len(self.courses)
+
+    @staticmethod
+    def _intern(value: str, table: List[str], index: Dict[str, int]) -> int:
+        """Return the code for a string, adding it to the string table if new"""
+        code = index.get(value)
+        if code is None:
+            code = len(table)
+            table.append(value)
+            index[value] = code
+        return code
+
+    def time_mask(self, course: Course) -> int:
+        """Weekly occupancy mask of a course, cached for catalog courses"""
+        i = self._index_by_id.get(id(course))
+        return weekly_mask(course) if i is None else self.time_masks[i]
+
+    def display_of(self, course: Course) -> CourseDisplay:
+        """Formatted display fields of a course, cached for catalog courses"""
+        i = self._index_by_id.get(id(course))
+        return CourseDisplay.of(course) if i is None else self.display[i]
+
+    def row_of(self, course_id: str) -> Optional[int]:
+        """Catalog row of a course, or None when the catalog has no course with that id"""
+        if self._row_by_course_id is None:
+            if isinstance(self.courses, LazyColumn):
+                ids = self._strings['course_id']
+                self._row_by_course_id = {
+                    str(ids[code]): i for i, code in enumerate(self._columns['course_id_codes'].tolist())
+                }
+            else:
+                self._row_by_course_id = {course.course_id: i for i, course in enumerate(self.courses)}
+        return self._row_by_course_id.get(course_id)
+
+    def update_enrollment(self, rows: np.ndarray, deltas: np.ndarray) -> np.ndarray:
+        """Add enrollment deltas to the given rows in place, returning the distinct rows changed.
+
+        The raw count is kept, even outside 0 and capacity when a feed's
+        deltas arrive out of order, so no delta is lost; taken clamps it.
+        Course objects that have already been created are updated too, except
+        frozen ones such as CompactCourse, for which the enrolled column is
+        authoritative.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        np.add.at(self.enrolled, rows, np.asarray(deltas, dtype=self.enrolled.dtype))
+        changed = np.unique(rows)
+
+        lazy = isinstance(self.courses, LazyColumn)
+        for i in changed.tolist():
+            course = self.courses.cached(i) if lazy else self.courses[i]
+            if course is not None:
+                try:
+                    course.enrolled = int(self.enrolled[i])
+                except FrozenInstanceError:
+                    pass
+        self.bump_version(changed)
+        return changed
+
+    def bump_version(self, rows: Optional[np.ndarray] = None):
+        """Mark results computed from the given rows (every row when None) as stale; safe to call from any thread"""
+        with _version_lock:
+            self.version += 1
+            self._changes.append((self.version, rows))
+
+    def changes_since(self, version: int) -> Tuple[int, Optional[np.ndarray]]:
+        """The current version and the distinct rows changed after the given one.
+
+        The rows are None when they are no longer known (or a change covered
+        every row), in which case anything computed at that version is stale.
+        """
+        with _version_lock:
+            current = self.version
+            if version == current:
+                return current, np.empty(0, dtype=np.int64)
+            if not self._changes or self._changes[0][0] > version + 1:
+                return current, None
+            changes = [rows for changed_at, rows in self._changes if changed_at > version]
+        if any(rows is None for rows in changes):
+            return current, None
+        return current, np.unique(np.concatenate(changes))
+
+    def taken(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Seats taken in every course, or only in the given rows: enrollment within 0 and capacity plus holds"""
+        if rows is None:
+            taken = np.clip(self.enrolled, 0, self.capacity)
+        else:
+            taken = np.clip(self.enrolled[rows], 0, self.capacity[rows])
+        if self.held is not None:
+            taken += self.held if rows is None else self.held[rows]
+        return taken
+
+    def availability(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Fraction of open seats for every course, or only for the given rows"""
+        capacity = self.capacity if rows is None else self.capacity[rows]
+        return (capacity - self.taken(rows)) / capacity
+
+    @timed('scoring')
+    def score(self, preferences: StudentPreferences, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Score every course against the preferences, matching ClassRecommender.calculate_course_score.
+
+        With rows set, only those courses are scored, in the order given.
+        """
+        points = self.preference_points(preferences, rows)
+        count('courses_scored', len(points))
+        return points + self.availability(rows) * 2.0
+
+    def preference_points(self, preferences: StudentPreferences, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """The integer part of score: points for matching time, days, subject and campus, availability aside"""
+        time_codes, day_masks, subject_codes, campus_codes = (
+            self.time_codes, self.day_masks, self.subject_codes, self.campus_codes
+        ) if rows is None else (
+            self.time_codes[rows], self.day_masks[rows], self.subject_codes[rows], self.campus_codes[rows]
+        )
+        # Points per time and subject code, looked up like score_batch does instead of searching the columns
+        preferred_times = np.zeros(len(self.time_values), dtype=np.int32)
+        for t in preferences.preferred_time_slots:
+            code = self._time_index.get(t.hour * 60 + t.minute) if t is not None else None
+            if code is not None:
+                preferred_times[code] = 2
+        preferred_subjects = np.zeros(len(self.subjects), dtype=np.int32)
+        for subject in preferences.preferred_subjects:
+            code = self.subject_index.get(subject)
+            if code is not None:
+                preferred_subjects[code] = 3
+
+        # Integer terms are accumulated first so the float score is identical to the scalar path
+        points = preferred_times[time_codes]
+        points += _POPCOUNT[day_masks & day_mask(preferences.preferred_days)]
+        points += preferred_subjects[subject_codes]
+        campus_code = self.campus_index.get(preferences.preferred_campus) if preferences.preferred_campus else None
+        if campus_code is not None:
+            points += (campus_codes == campus_code) * 2
+        return points
+
+    @timed('scoring')
+    def score_batch(self, preferences_list: List[StudentPreferences]) -> np.ndarray:
+        """Score every course for many students at once, returning a students x courses matrix"""
+        n_students = len(preferences_list)
+        count('courses_scored', n_students * len(self.day_masks))
+        preferred_times = np.zeros((n_students, len(self.time_values)), dtype=np.int32)
+        preferred_subjects = np.zeros((n_students, len(self.subjects)), dtype=np.int32)
+        preferred_days = np.empty(n_students, dtype=np.uint8)
+        preferred_campus = np.full(n_students, -1, dtype=np.int32)
+
+        for row, preferences in enumerate(preferences_list):
+            for t in preferences.preferred_time_slots:
+                code = self._time_index.get(t.hour * 60 + t.minute) if t is not None else None
+                if code is not None:
+                    preferred_times[row, code] = 2
+            for subject in preferences.preferred_subjects:
+                code = self.subject_index.get(subject)
+                if code is not None:
+                    preferred_subjects[row, code] = 3
+            preferred_days[row] = day_mask(preferences.preferred_days)
+            if preferences.preferred_campus:
+                preferred_campus[row] = self.campus_index.get(preferences.preferred_campus, -1)
+
+        points = preferred_times[:, self.time_codes]
+        points += _POPCOUNT[preferred_days[:, None] & self.day_masks[None, :]]
+        points += preferred_subjects[:, self.subject_codes]
+        points += (preferred_campus[:, None] == self.campus_codes[None, :]) * 2
+
+        return points + self.availability()[None, :] * 2.0
@@ -0,0 +1,154 @@
+"""On-disk columnar catalog format.
+
+A catalog directory holds one .npy file per numeric column, a <field>_codes.npy
+column for every string field and a <field>_strings.npy table of the distinct
+values. Sections whose meetings are not one start time and duration on each
+of their days also get (row, day, start, end) rows in meetings.npy. Opening it
+memory-maps the arrays, so every process serving the same catalog shares the
+same pages and startup cost does not grow with catalog size.
+
+Registrar exports are converted with ingest.py.
+"""
+import json
+import os
+from typing import Dict, Iterable, List, Tuple
+from models import Course
+from catalog import CourseCatalog, meeting_columns
+import numpy as np
+
+FORMAT_VERSION = 2
+
+# Version 1 catalogs have no durations column or meetings table and only hold 1-hour classes
+SUPPORTED_VERSIONS = (1, 2)
+
+STRING_FIELDS = ['course_id', 'course_name', 'subject', 'professor', 'campus', 'building', 'room']
+
+COLUMN_DTYPES = {
+    'start_minutes': np.int32,
+    'day_masks': np.uint8,
+    'durations': np.int16,
+    'capacity': np.int32,
+    'enrolled': np.int32,
+    'credits': np.int32,
+    **{field + '_codes': np.int32 for field in STRING_FIELDS},
+}
+
+
+class CatalogWriter:
+    """Streams courses into a catalog directory with memory bounded by the buffer size.
+
+    Columns are appended to raw files as buffers fill up and turned into
+    .npy files on close. Only the string tables are kept in memory.
+    """
+
+    def __init__(self, path: str, buffer_size: int = 65536):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.count = 0
+        self._tables: Dict[str, List[str]] = {field: [] for field in STRING_FIELDS}
+        self._indexes: Dict[str, Dict[str, int]] = {field: {} for field in STRING_FIELDS}
+        self._buffers: Dict[str, List[int]] = {name: [] for name in COLUMN_DTYPES}
+        # Irregular meeting patterns are rare, so they stay in memory until close
+        self._meetings: List[Tuple[int, int, int, int]] = []
+        os.makedirs(path, exist_ok=True)
+        self._files = {name: open(self._raw_path(name), 'wb') for name in COLUMN_DTYPES}
+
+    def _raw_path(self, name: str) -> str:
+        return os.path.join(self.path, name + '.raw')
+
+    def add(self, course: Course):
+        """Append one course to the catalog"""
+        buffers = self._buffers
+        for field in STRING_FIELDS:
+            value = getattr(course, field)
+            code = self._indexes[field].get(value)
+            if code is None:
+                code = self._indexes[field][value] = len(self._tables[field])
+                self._tables[field].append(value)
+            buffers[field + '_codes'].append(code)
+        start, days, duration, irregular = meeting_columns(course)
+        buffers['start_minutes'].append(start)
+        buffers['day_masks'].append(days)
+        buffers['durations'].append(duration)
+        if irregular is not None:
+            self._meetings.extend((self.count, *meeting) for meeting in irregular)
+        buffers['capacity'].append(course.capacity)
+        buffers['enrolled'].append(course.enrolled)
+        buffers['credits'].append(course.credits)
+
+        self.count += 1
+        if len(buffers['credits']) >= self.buffer_size:
+            self._flush()
+
+    def add_all(self, courses: Iterable[Course]):
+        for course in courses:
+            self.add(course)
+
+    def _flush(self):
+        for name, values in self._buffers.items():
+            np.array(values, dtype=COLUMN_DTYPES[name]).tofile(self._files[name])
+            values.clear()
+
+    def close(self):
+        """Write the remaining rows and produce the final .npy columns, string tables and metadata"""
+        self._flush()
+        for name, dtype in COLUMN_DTYPES.items():
+            self._files[name].close()
+            target = os.path.join(self.path, name + '.npy')
+            if self.count:
+                column = np.lib.format.open_memmap(target, mode='w+', dtype=dtype, shape=(self.count,))
+                column[:] = np.memmap(self._raw_path(name), dtype=dtype, mode='r')
+                column.flush()
+                del column
+            else:
+                np.save(target, np.empty(0, dtype=dtype))
+            os.remove(self._raw_path(name))
+
+        for field, table in self._tables.items():
+            np.save(os.path.join(self.path, field + '_strings.npy'), np.array(table, dtype=str))
+        np.save(os.path.join(self.path, 'meetings.npy'), np.array(self._meetings, dtype=np.int32).reshape(-1, 4))
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump({'version': FORMAT_VERSION, 'count': self.count}, f)
+
+    def __enter__(self) -> 'CatalogWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def discard(self):
+        """Abandon the catalog being written and remove its temporary files"""
+        for name, f in self._files.items():
+            f.close()
+            os.remove(self._raw_path(name))
+
+
+def save_catalog(courses: Iterable[Course], path: str):
+    """Write courses to a catalog directory"""
+    with CatalogWriter(path) as writer:
+        writer.add_all(courses)
+
+
+def open_catalog(path: str, mmap: bool = True) -> CourseCatalog:
+    """Open a catalog directory, memory-mapping its arrays unless mmap is False"""
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta.get('version') not in SUPPORTED_VERSIONS:
+        raise ValueError(f"Unsupported catalog format version: {meta.get('version')}")
+
+    mmap_mode = 'r' if mmap else None
+    columns = {
+        name: np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode)
+        for name in COLUMN_DTYPES
+        if name != 'durations' or meta['version'] >= 2
+    }
+    strings = {
+        field: np.load(os.path.join(path, field + '_strings.npy'), mmap_mode=mmap_mode)
+        for field in STRING_FIELDS
+    }
+    meetings_path = os.path.join(path, 'meetings.npy')
+    meetings = np.load(meetings_path) if os.path.exists(meetings_path) else None
+    return CourseCatalog.from_columns(columns, strings, meetings)
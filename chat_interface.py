@@ -1,14 +1,266 @@
 import os
-from openai import OpenAI
+import asyncio
+import random
+from openai import OpenAI, AsyncOpenAI, APIError, RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
 from dotenv import load_dotenv
-from models import StudentPreferences
+from models import StudentPreferences, WEEKDAYS
+from preference_cache import PreferenceCache, MemoryPreferenceCache
+from instrumentation import count, timed
+from ingest import normalize_days
 from datetime import time
+from typing import Dict, List, Optional, Tuple
 import json
+import re
+
+DAY_NAMES = {
+    'monday': 'Monday', 'mon': 'Monday', 'mondays': 'Monday',
+    'tuesday': 'Tuesday', 'tue': 'Tuesday', 'tues': 'Tuesday', 'tuesdays': 'Tuesday',
+    'wednesday': 'Wednesday', 'wed': 'Wednesday', 'wednesdays': 'Wednesday',
+    'thursday': 'Thursday', 'thu': 'Thursday', 'thur': 'Thursday', 'thurs': 'Thursday', 'thursdays': 'Thursday',
+    'friday': 'Friday', 'fri': 'Friday', 'fridays': 'Friday',
+    'saturday': 'Saturday', 'saturdays': 'Saturday',
+    'sunday': 'Sunday', 'sundays': 'Sunday',
+}
+
+TIMES_OF_DAY = {
+    'morning': ['08:00', '09:00', '10:00', '11:00'],
+    'afternoon': ['12:00', '13:00', '14:00', '15:00', '16:00'],
+    'evening': ['17:00', '18:00', '19:00', '20:00'],
+}
+
+# Errors worth retrying with backoff: rate limits, timeouts and transient server or network failures
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError, asyncio.TimeoutError)
+
+# Errors that fail one extraction in a batch: any API error once retries are exhausted, or a malformed response
+EXTRACTION_ERRORS = RETRYABLE_ERRORS + (APIError, ValueError, TypeError)
+
+CLARIFYING_QUESTIONS = {
+    'max_commute_time': "What is your maximum acceptable commute time in minutes?",
+    'preferred_time_slots': "What are your preferred class times? (e.g., 9:00 AM, 2:00 PM)",
+    'preferred_days': "Which days of the week do you prefer for classes?",
+    'max_classes_per_day': "What is the maximum number of classes you want to take per day?",
+    'min_gap_between_classes': "What is the minimum gap you want between classes in minutes?",
+    'preferred_subjects': "What subjects are you interested in?",
+}
+
+# Fields that a bare number answers when it is the only question left
+NUMERIC_FIELDS = ['max_commute_time', 'max_classes_per_day', 'min_gap_between_classes']
+
+NUMBER_WORDS = {'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6}
+
+# Words that carry no preference information and don't count against parser confidence
+FILLER_WORDS = {
+    'i', 'im', 'id', 'want', 'would', 'like', 'prefer', 'preferably', 'need', 'needs', 'class', 'classes',
+    'course', 'courses', 'on', 'and', 'or', 'the', 'a', 'an', 'with', 'at', 'in', 'my', 'me', 'to', 'of',
+    'please', 'only', 'some', 'take', 'taking', 'can', 'could', 'be', 'have', 'for', 'is', 'are', 'do',
+    'also', 'but', 'more', 'than', 'most', 'least', 'between', 'them', 'each', 'per', 'day', 'days',
+    'max', 'maximum', 'minimum', 'min', 'mins', 'minute', 'minutes', 'up', 'just', 'all', 'any', 'mostly',
+    'time', 'times', 'schedule', 'this', 'semester', 'it', 'that', 'so', 'should', 'will', 'am', 'pm',
+    'gap', 'gaps', 'break', 'breaks', 'interested', 'into', 'about', 'around', 'ideally', 'really',
+}
+
+# Words that exclude or negate what follows ("no classes on Friday", "nothing before 10am"); the
+# parser only understands positive preferences, so inputs using them are left to the model
+NEGATION_WORDS = {
+    'no', 'not', 'dont', 'never', 'nothing', 'none', 'avoid', 'except', 'excluding', 'without',
+    'before', 'after', 'cant', 'cannot', 'wont', 'hate',
+}
+
+_NUMBER = r'(\d+|' + '|'.join(NUMBER_WORDS) + r')'
+_MAX_PER_DAY = re.compile(
+    r'(?:max(?:imum)?(?: of)?|at most|no more than|up to|only)\s+' + _NUMBER
+    + r'\s*(?:classes|class|courses|course)?\s*(?:per|a|each)\s+day')
+_MIN_GAP = re.compile(
+    r'(?:at least\s+)?(\d+)[\s-]*min(?:ute)?s?\s*(?:gap|break)?s?\s*(?:between|gap|break)')
+_COMMUTE = re.compile(
+    r'commute\s*(?:time)?\s*(?:of|up to|at most|for|is|under|max(?:imum)?|no more than)?\s*(\d+)\s*min'
+    r'|(\d+)[\s-]*min(?:ute)?s?\s*(?:max(?:imum)?\s*)?commute')
+_CREDITS = re.compile(r'(\d+)\s*credits?')
+_CLOCK_TIME = re.compile(r'\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b|\b(\d{1,2}):(\d{2})\b')
+_WORD = re.compile(r"[a-z0-9']+")
+_DAY_WORD = '|'.join(sorted(DAY_NAMES, key=len, reverse=True))
+_DAY_RANGE = re.compile(rf"\b({_DAY_WORD})\s*(?:-|–|through|thru|to|till|until)\s*({_DAY_WORD})\b")
+# Compact registrar day codes such as "MWF" or "TTh", matched case-sensitively so words like "must" aren't days
+_DAY_CODES = re.compile(r'\b(?:Th|Tu|Sa|Su|[MTWRF]){2,}\b')
+# Words that mark a range of days the parser didn't recognize as one
+RANGE_WORDS = {'through', 'thru', 'till', 'until'}
+# A time of day only counts as a class preference in a clause that mentions classes
+# ("I work afternoons so morning classes please")
+_CLAUSE_BREAK = re.compile(r'[,.;!?]|\b(?:so|but|because|since|while)\b')
+_CLASS_NOUN = re.compile(r'\b(?:class|classes|course|courses|lecture|lectures|section|sections)\b')
+
+
+class RuleBasedParser:
+    """Deterministic parser for common ways of stating class preferences.
+
+    Returns the same dict shape as the LLM extraction together with a
+    confidence in [0, 1]: the share of meaningful words in the input that
+    were understood. Low confidence means the input should go to the model.
+    """
+
+    def __init__(self, subjects: Optional[List[str]] = None, campuses: Optional[List[str]] = None):
+        self.subject_keywords = self._subject_keywords(subjects or [])
+        self.max_keyword_words = max((len(keyword.split()) for keyword in self.subject_keywords), default=1)
+        self.campuses = list(campuses or [])
+
+    @staticmethod
+    def _subject_keywords(subjects: List[str]) -> Dict[str, str]:
+        """Map lowercase keywords (full names, acronyms, word prefixes) to catalog subjects"""
+        keywords = {}
+        for subject in subjects:
+            words = subject.lower().split()
+            keywords[subject.lower()] = subject
+            if len(words) > 1:
+                keywords.setdefault(''.join(word[0] for word in words), subject)
+            # Common short forms such as "math", "chem" and "econ"
+            for length in range(4, len(words[0]) + 1):
+                keywords.setdefault(words[0][:length], subject)
+        return keywords
+
+    def parse(self, user_input: str) -> Tuple[dict, float]:
+        text = user_input.lower()
+        preferences = {}
+        spans = []
+
+        def found(match):
+            spans.append(match.span())
+
+        # Inputs the parser could read more than one way go to the model
+        ambiguous = False
+
+        days = []
+        for match in _DAY_RANGE.finditer(text):
+            first, last = (WEEKDAYS.index(DAY_NAMES[group]) for group in match.groups())
+            if first <= last:
+                days.extend(WEEKDAYS[first:last + 1])
+                found(match)
+            else:
+                ambiguous = True
+        for match in _WORD.finditer(text):
+            if any(start <= match.start() < end for start, end in spans):
+                continue
+            day = DAY_NAMES.get(match.group())
+            if day:
+                days.append(day)
+                found(match)
+            elif match.group() in ('weekday', 'weekdays'):
+                days.extend(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'])
+                found(match)
+        for match in _DAY_CODES.finditer(user_input):
+            days.extend(normalize_days(match.group()))
+            found(match)
+        if days:
+            preferences['preferred_days'] = list(dict.fromkeys(days))
+
+        time_slots = []
+        for match in _WORD.finditer(text):
+            word = match.group().rstrip('s')
+            if word in TIMES_OF_DAY:
+                if _CLASS_NOUN.search(self._clause(text, match.start())):
+                    time_slots.extend(TIMES_OF_DAY[word])
+                    found(match)
+                else:
+                    ambiguous = True
+        for match in _CLOCK_TIME.finditer(text):
+            hour, minute, meridiem, hour24, minute24 = match.groups()
+            if meridiem:
+                hour = int(hour) % 12 + (12 if meridiem == 'pm' else 0)
+            else:
+                hour, minute = int(hour24), minute24
+            if hour < 24 and int(minute or 0) < 60:
+                time_slots.append(f"{hour:02d}:{int(minute or 0):02d}")
+                found(match)
+        if time_slots:
+            preferences['preferred_time_slots'] = list(dict.fromkeys(time_slots))
+
+        for key, pattern in (('max_classes_per_day', _MAX_PER_DAY), ('min_gap_between_classes', _MIN_GAP),
+                             ('max_commute_time', _COMMUTE)):
+            match = pattern.search(text)
+            if match:
+                value = next(group for group in match.groups() if group)
+                preferences[key] = NUMBER_WORDS.get(value) or int(value)
+                found(match)
+
+        match = _CREDITS.search(text)
+        if match:
+            preferences['required_credits'] = int(match.group(1))
+            found(match)
+
+        # Match the longest keyword phrase starting at each word
+        subjects = []
+        words = list(_WORD.finditer(text))
+        i = 0
+        while i < len(words):
+            for n in range(min(self.max_keyword_words, len(words) - i), 0, -1):
+                subject = self.subject_keywords.get(' '.join(match.group() for match in words[i:i + n]))
+                if subject:
+                    subjects.append(subject)
+                    spans.append((words[i].start(), words[i + n - 1].end()))
+                    i += n
+                    break
+            else:
+                i += 1
+        if subjects:
+            preferences['preferred_subjects'] = list(dict.fromkeys(subjects))
+
+        for campus in self.campuses:
+            name = campus.lower()
+            short = name.replace(' campus', '')
+            match = re.search(r'\b' + re.escape(name) + r'\b', text) or \
+                re.search(r'\b' + re.escape(short) + r'\s+campus\b', text)
+            if match:
+                preferences['preferred_campus'] = campus
+                found(match)
+                break
+
+        return preferences, 0.0 if ambiguous else self._confidence(text, spans, preferences)
+
+    @staticmethod
+    def _clause(text: str, position: int) -> str:
+        """The part of text around position between clause breaks such as commas or 'so'"""
+        start = max((match.end() for match in _CLAUSE_BREAK.finditer(text, 0, position)), default=0)
+        end = _CLAUSE_BREAK.search(text, position)
+        return text[start:end.start() if end else len(text)]
+
+    @staticmethod
+    def _confidence(text: str, spans: List[Tuple[int, int]], preferences: dict) -> float:
+        """Share of non-filler words covered by a recognized phrase, or 0 if the input negates anything"""
+        if not preferences:
+            return 0.0
+        uncovered = (match.group().replace("'", '') for match in _WORD.finditer(text)
+                     if not any(start <= match.start() < end for start, end in spans))
+        if any(word in NEGATION_WORDS or word in RANGE_WORDS for word in uncovered):
+            return 0.0
+        words = [match for match in _WORD.finditer(text) if match.group().replace("'", '') not in FILLER_WORDS
+                 and not match.group().isdigit()]
+        if not words:
+            return 1.0
+        covered = sum(
+            any(start <= match.start() < end for start, end in spans)
+            for match in words
+        )
+        return covered / len(words)
+
 
 class ChatInterface:
-    def __init__(self):
+    # Bump whenever system_prompt changes so cached extractions are not reused
+    PROMPT_VERSION = "1"
+
+    def __init__(self, client: Optional[OpenAI] = None, cache: Optional[PreferenceCache] = None,
+                 subjects: Optional[List[str]] = None, campuses: Optional[List[str]] = None,
+                 min_rule_confidence: float = 0.75, async_client: Optional[AsyncOpenAI] = None,
+                 request_timeout: float = 30.0, max_retries: int = 3, max_concurrency: int = 8):
         load_dotenv()
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.client = client if client is not None else OpenAI(
+            api_key=os.getenv('OPENAI_API_KEY'), timeout=request_timeout, max_retries=max_retries)
+        # Created on first use, so purely synchronous callers never need it
+        self._async_client = async_client
+        self.cache = cache if cache is not None else MemoryPreferenceCache()
+        self.rule_parser = RuleBasedParser(subjects, campuses)
+        self.min_rule_confidence = min_rule_confidence
         self.system_prompt = """You are a helpful class selection assistant. Your task is to extract student preferences 
         from their natural language input and convert them into structured data. You should ask clarifying questions 
         when needed and ensure all necessary information is collected.
@@ -34,23 +286,118 @@ class ChatInterface:
         except ValueError:
             return None
 
+    @timed('extract_preferences')
     def extract_preferences(self, user_input: str) -> dict:
-        """Extract preferences from user input using ChatGPT"""
-        response = self.client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
+        """Extract preferences from user input using ChatGPT, reusing cached results for the same input"""
+        key = self.cache.make_key(user_input, self.PROMPT_VERSION)
+        preferences = self.cache.get(key)
+        if preferences is not None:
+            return preferences
+
+        preferences = self._request_preferences(user_input)
+        if preferences is not None:
+            self.cache.set(key, preferences)
+        return preferences
+
+    def _request_preferences(self, user_input: str) -> dict:
+        """Ask the model to extract preferences from user input"""
+        count('model_requests')
+        response = self.client.chat.completions.create(**self._completion_args(user_input))
+        return self._parse_response(response)
+
+    def _completion_args(self, user_input: str) -> dict:
+        return {
+            "model": "gpt-3.5-turbo",
+            "messages": [
                 {"role": "system", "content": self.system_prompt},
                 {"role": "user", "content": user_input}
             ],
-            response_format={"type": "json_object"}
-        )
-        
+            "response_format": {"type": "json_object"}
+        }
+
+    def _parse_response(self, response) -> dict:
         try:
             preferences = json.loads(response.choices[0].message.content)
             return preferences
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, TypeError):
             return None
 
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        if self._async_client is None:
+            # Retries are handled in _arequest_preferences so they can use jittered backoff
+            self._async_client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'), timeout=self.request_timeout,
+                                             max_retries=0)
+        return self._async_client
+
+    @timed('extract_preferences')
+    async def aextract_preferences(self, user_input: str, deadline: Optional[float] = None) -> dict:
+        """Async version of extract_preferences.
+
+        deadline bounds the whole extraction in seconds, including retries,
+        and raises asyncio.TimeoutError when exceeded.
+        """
+        key = self.cache.make_key(user_input, self.PROMPT_VERSION)
+        preferences = self.cache.get(key)
+        if preferences is not None:
+            return preferences
+
+        preferences = await asyncio.wait_for(self._arequest_preferences(user_input), deadline)
+        if preferences is not None:
+            self.cache.set(key, preferences)
+        return preferences
+
+    async def _arequest_preferences(self, user_input: str) -> dict:
+        """Ask the model for preferences, retrying transient failures with jittered exponential backoff"""
+        for attempt in range(self.max_retries + 1):
+            count('model_requests')
+            try:
+                response = await asyncio.wait_for(
+                    self.async_client.chat.completions.create(**self._completion_args(user_input)),
+                    self.request_timeout
+                )
+                return self._parse_response(response)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self._backoff_delay(attempt, e))
+
+    @staticmethod
+    def _backoff_delay(attempt: int, error: Exception, base: float = 0.5, cap: float = 20.0) -> float:
+        """Full-jitter exponential backoff, never shorter than a server-provided Retry-After"""
+        delay = random.uniform(0, min(cap, base * 2 ** attempt))
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        try:
+            return max(delay, float(retry_after)) if retry_after else delay
+        except ValueError:
+            return delay
+
+    async def extract_many(self, user_inputs: List[str], deadline: Optional[float] = None) -> List[Optional[dict]]:
+        """Extract preferences for many inputs concurrently, at most max_concurrency requests at a time.
+
+        Inputs whose extraction fails or misses its deadline get None.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def extract(user_input: str) -> Optional[dict]:
+            async with semaphore:
+                try:
+                    return await self.aextract_preferences(user_input, deadline)
+                except EXTRACTION_ERRORS:
+                    return None
+
+        return await asyncio.gather(*(extract(user_input) for user_input in user_inputs))
+
+    def parse_preferences(self, user_input: str) -> dict:
+        """Parse simple inputs locally and only fall back to ChatGPT when the rule-based parse is unsure"""
+        preferences, confidence = self.rule_parser.parse(user_input)
+        if confidence >= self.min_rule_confidence:
+            count('rule_parser_answers')
+            return preferences
+        return self.extract_preferences(user_input)
+
+    @timed('convert_to_student_preferences')
     def convert_to_student_preferences(self, preferences_dict: dict) -> StudentPreferences:
         """Convert the extracted preferences into a StudentPreferences object"""
         return StudentPreferences(
@@ -65,24 +412,29 @@ class ChatInterface:
 
     def get_clarifying_questions(self, preferences_dict: dict) -> list:
         """Generate questions for missing or unclear preferences"""
-        questions = []
-        if not preferences_dict.get('max_commute_time'):
-            questions.append("What is your maximum acceptable commute time in minutes?")
-        if not preferences_dict.get('preferred_time_slots'):
-            questions.append("What are your preferred class times? (e.g., 9:00 AM, 2:00 PM)")
-        if not preferences_dict.get('preferred_days'):
-            questions.append("Which days of the week do you prefer for classes?")
-        if not preferences_dict.get('max_classes_per_day'):
-            questions.append("What is the maximum number of classes you want to take per day?")
-        if not preferences_dict.get('min_gap_between_classes'):
-            questions.append("What is the minimum gap you want between classes in minutes?")
-        if not preferences_dict.get('preferred_subjects'):
-            questions.append("What subjects are you interested in?")
-        return questions
+        return [CLARIFYING_QUESTIONS[field] for field in self.missing_fields(preferences_dict)]
+
+    def missing_fields(self, preferences_dict: dict) -> list:
+        """Required preference fields that are missing or empty"""
+        # 0 is a real answer for the numeric fields (no gap, no per-day limit)
+        return [field for field in CLARIFYING_QUESTIONS if preferences_dict.get(field) in (None, '', [])]
 
     def chat(self, user_input: str) -> tuple[StudentPreferences, list]:
         """Main chat interface that handles the conversation"""
-        preferences_dict = self.extract_preferences(user_input)
+        return self.respond(self.parse_preferences(user_input))
+
+    async def achat(self, user_input: str, deadline: Optional[float] = None) -> tuple[StudentPreferences, list]:
+        """Async version of chat"""
+        preferences_dict, confidence = self.rule_parser.parse(user_input)
+        if confidence < self.min_rule_confidence:
+            try:
+                preferences_dict = await self.aextract_preferences(user_input, deadline)
+            except RETRYABLE_ERRORS:
+                preferences_dict = None
+        return self.respond(preferences_dict)
+
+    def respond(self, preferences_dict: dict) -> tuple[StudentPreferences, list]:
+        """Turn extracted preferences into StudentPreferences or the questions still to ask"""
         if not preferences_dict:
             return None, ["I'm sorry, I couldn't understand your preferences. Could you please try again?"]
         
@@ -94,4 +446,55 @@ class ChatInterface:
             preferences = self.convert_to_student_preferences(preferences_dict)
             return preferences, []
         except (ValueError, TypeError) as e:
-            return None, [f"I encountered an error processing your preferences: {str(e)}. Could you please clarify?"] 
\ No newline at end of file
+            return None, [f"I encountered an error processing your preferences: {str(e)}. Could you please clarify?"]
+
+
+class ChatSession:
+    """Multi-turn conversation with one student.
+
+    Preferences from each turn are merged into what is already known, so
+    answers to clarifying questions only need to cover the missing fields
+    and the model is only sent the new message.
+    """
+
+    def __init__(self, chat_interface: ChatInterface):
+        self.chat_interface = chat_interface
+        self.preferences: dict = {}
+
+    def send(self, user_input: str) -> tuple[StudentPreferences, list]:
+        """Handle one turn, returning StudentPreferences once complete or the questions still open"""
+        self.preferences.update({
+            field: value
+            for field, value in (self._parse_turn(user_input) or {}).items()
+            if value not in (None, '', [])
+        })
+        return self.chat_interface.respond(self.preferences)
+
+    def missing_fields(self) -> list:
+        return self.chat_interface.missing_fields(self.preferences)
+
+    def reset(self):
+        self.preferences = {}
+
+    def _parse_turn(self, user_input: str) -> dict:
+        missing = self.missing_fields()
+
+        # A bare number answers the question when only one numeric field is open
+        match = re.fullmatch(r'\s*(\d+)\s*(?:min(?:ute)?s?|classes|class)?\s*\.?\s*', user_input.lower())
+        open_numeric = [field for field in missing if field in NUMERIC_FIELDS]
+        if match and len(open_numeric) == 1:
+            return {open_numeric[0]: int(match.group(1))}
+
+        delta, confidence = self.chat_interface.rule_parser.parse(user_input)
+        if confidence >= self.chat_interface.min_rule_confidence:
+            return delta
+
+        if not self.preferences:
+            return self.chat_interface.extract_preferences(user_input)
+        # Tell the model what is still needed instead of resending the conversation
+        prompt = f"Still needed: {', '.join(missing)}.\n{user_input}" if missing else user_input
+        delta = self.chat_interface.extract_preferences(prompt) or {}
+        if not missing:
+            return delta
+        # The model may fill in defaults for everything; never let them overwrite earlier answers
+        return {field: value for field, value in delta.items() if field in missing or field not in self.preferences}
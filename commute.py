@@ -0,0 +1,76 @@
+"""Travel times between buildings for commute-aware scheduling.
+
+Travel times come from a local CSV with from,to,minutes columns, where from
+and to are building or campus names:
+
+    from,to,minutes
+    Main Campus,Science Campus,25
+    Science Hall,Math Building,4
+
+Times are symmetric unless both directions are listed. A building pair
+without an entry falls back to the time between the buildings' campuses,
+then to same_campus_minutes or default_minutes.
+"""
+import csv
+from typing import Dict, Optional, Tuple
+from catalog import CourseCatalog
+import numpy as np
+
+
+class CommuteModel:
+    """Travel times between locations, turned into a matrix over a catalog's building codes"""
+
+    def __init__(self, times: Optional[Dict[Tuple[str, str], int]] = None, same_campus_minutes: int = 5,
+                 default_minutes: int = 30):
+        self.times: Dict[Tuple[str, str], int] = {}
+        for (origin, destination), minutes in (times or {}).items():
+            self.add(origin, destination, minutes)
+        self.same_campus_minutes = same_campus_minutes
+        self.default_minutes = default_minutes
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> 'CommuteModel':
+        """Read travel times from a from,to,minutes CSV file"""
+        model = cls(**kwargs)
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                model.add(row['from'].strip(), row['to'].strip(), int(row['minutes']))
+        return model
+
+    def add(self, origin: str, destination: str, minutes: int):
+        """Set the travel time between two locations, and the reverse trip unless it was given"""
+        if minutes < 0:
+            raise ValueError(f"Invalid travel time from {origin} to {destination}: {minutes}")
+        self.times[(origin, destination)] = minutes
+        self.times.setdefault((destination, origin), minutes)
+
+    def travel_time(self, from_building: str, from_campus: Optional[str],
+                    to_building: str, to_campus: Optional[str]) -> int:
+        """Minutes to get from one building to another"""
+        if from_building == to_building:
+            return 0
+        minutes = self.times.get((from_building, to_building))
+        if minutes is not None:
+            return minutes
+        if from_campus is None or to_campus is None:
+            return self.default_minutes
+        if from_campus == to_campus:
+            return self.same_campus_minutes
+        return self.times.get((from_campus, to_campus), self.default_minutes)
+
+    def matrix(self, catalog: CourseCatalog) -> np.ndarray:
+        """Travel minutes between every pair of buildings, indexed by the catalog's building codes.
+
+        Each building belongs to the campus of the first course held in it.
+        """
+        n = len(catalog.buildings)
+        campus_of = [None] * n
+        codes, first = np.unique(catalog.building_codes, return_index=True)
+        for code, i in zip(codes.tolist(), first.tolist()):
+            campus_of[code] = catalog.campuses[catalog.campus_codes[i]]
+
+        travel = np.zeros((n, n), dtype=np.int16)
+        for a, from_building in enumerate(catalog.buildings):
+            for b, to_building in enumerate(catalog.buildings):
+                travel[a, b] = self.travel_time(from_building, campus_of[a], to_building, campus_of[b])
+        return travel
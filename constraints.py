@@ -0,0 +1,95 @@
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+from models import WEEKDAYS
+import numpy as np
+
+# A single class meeting: (weekday index, start minute, end minute)
+Meeting = Tuple[int, int, int]
+
+
+class DailyLoad:
+    """Per-day class counts and sorted meeting times for a schedule under construction.
+
+    Checking whether a course still fits max_classes_per_day and
+    min_gap_between_classes costs O(log k) per meeting, and adding or
+    removing a course updates the state in place.
+
+    With a travel matrix (minutes between building codes, see commute.py),
+    the gap between back-to-back classes must also cover the walk or ride
+    between their buildings, and with max_commute set the travel time
+    between classes on a day may not add up to more than max_commute.
+    """
+
+    def __init__(self, max_classes_per_day: int, min_gap_between_classes: int,
+                 travel: Optional[np.ndarray] = None, max_commute: int = 0):
+        # A limit of 0 means the student did not set one
+        self.max_classes_per_day = max_classes_per_day
+        self.min_gap = max(min_gap_between_classes, 0)
+        self.travel = travel
+        self.max_commute = max_commute if travel is not None else 0
+        self.counts = [0] * len(WEEKDAYS)
+        self.starts: List[List[int]] = [[] for _ in WEEKDAYS]
+        self.ends: List[List[int]] = [[] for _ in WEEKDAYS]
+        self.buildings: List[List[int]] = [[] for _ in WEEKDAYS]
+        self.commute = [0] * len(WEEKDAYS)
+
+    def _gap(self, from_building: int, to_building: int) -> int:
+        """Minimum minutes between two back-to-back classes in the given buildings"""
+        if self.travel is None or from_building < 0 or to_building < 0:
+            return self.min_gap
+        return max(self.min_gap, int(self.travel[from_building, to_building]))
+
+    def _travel(self, from_building: int, to_building: int) -> int:
+        if self.travel is None or from_building < 0 or to_building < 0:
+            return 0
+        return int(self.travel[from_building, to_building])
+
+    def fits(self, meetings: List[Meeting], building: int = -1) -> bool:
+        """Check if a course with these meetings can be added without breaking a daily constraint"""
+        for day, start, end in meetings:
+            if self.max_classes_per_day > 0 and self.counts[day] >= self.max_classes_per_day:
+                return False
+
+            starts = self.starts[day]
+            buildings = self.buildings[day]
+            pos = bisect_right(starts, start)
+            before = buildings[pos - 1] if pos > 0 else -1
+            after = buildings[pos] if pos < len(starts) else -1
+            if pos > 0 and self.ends[day][pos - 1] + self._gap(before, building) > start:
+                return False
+            if pos < len(starts) and starts[pos] < end + self._gap(building, after):
+                return False
+
+            if self.max_commute > 0:
+                # The class replaces the trip between its neighbours with two trips through its building
+                commute = (self.commute[day] + self._travel(before, building) + self._travel(building, after)
+                           - self._travel(before, after))
+                if commute > self.max_commute:
+                    return False
+        return True
+
+    def add(self, meetings: List[Meeting], building: int = -1):
+        """Record the meetings of a course added to the schedule"""
+        for day, start, end in meetings:
+            pos = bisect_right(self.starts[day], start)
+            buildings = self.buildings[day]
+            before = buildings[pos - 1] if pos > 0 else -1
+            after = buildings[pos] if pos < len(buildings) else -1
+            self.commute[day] += self._travel(before, building) + self._travel(building, after) - self._travel(before, after)
+            self.starts[day].insert(pos, start)
+            self.ends[day].insert(pos, end)
+            buildings.insert(pos, building)
+            self.counts[day] += 1
+
+    def remove(self, meetings: List[Meeting]):
+        """Forget the meetings of a course removed from the schedule"""
+        for day, start, end in meetings:
+            pos = bisect_right(self.starts[day], start) - 1
+            buildings = self.buildings[day]
+            before = buildings[pos - 1] if pos > 0 else -1
+            after = buildings[pos + 1] if pos + 1 < len(buildings) else -1
+            self.commute[day] -= self._travel(before, buildings[pos]) + self._travel(buildings[pos], after) - self._travel(before, after)
+            del self.starts[day][pos]
+            del self.ends[day][pos]
+            del buildings[pos]
+            self.counts[day] -= 1
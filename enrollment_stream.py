@@ -0,0 +1,89 @@
+import json
+import random
+import time
+from dataclasses import dataclass, asdict
+from typing import Iterable, Iterator, List, Sequence
+
+
+@dataclass(frozen=True)
+class EnrollmentEvent:
+    """A change in the number of students enrolled in a course"""
+    timestamp: float  # seconds since the start of the stream
+    course_id: str
+    delta: int  # positive for added students, negative for drops
+
+
+class ReplayEnrollmentStream:
+    """Local stand-in for the registration system's enrollment feed.
+
+    Replays a fixed list of events, either as fast as possible or paced by
+    their timestamps (scaled by speed), in batches that can be passed to
+    ClassRecommender.apply_enrollment_deltas. Events can be saved to and
+    loaded from JSON lines, so a recorded registration window can be replayed
+    exactly.
+    """
+
+    def __init__(self, events: Iterable[EnrollmentEvent], speed: float = 0.0):
+        self.events: List[EnrollmentEvent] = sorted(events, key=lambda event: event.timestamp)
+        # 0 replays without waiting, 1 in real time, 10 ten times faster
+        self.speed = speed
+
+    @classmethod
+    def load(cls, path: str, speed: float = 0.0) -> 'ReplayEnrollmentStream':
+        with open(path, encoding='utf-8') as f:
+            return cls((EnrollmentEvent(**json.loads(line)) for line in f if line.strip()), speed)
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            for event in self.events:
+                f.write(json.dumps(asdict(event)) + '\n')
+
+    @classmethod
+    def synthetic(cls, course_ids: Sequence[str], count: int, rate: float = 100.0, drop_ratio: float = 0.2,
+                  hot_fraction: float = 0.1, seed: int = 0, speed: float = 0.0) -> 'ReplayEnrollmentStream':
+        """Generate a reproducible stream of count events arriving at rate events per second.
+
+        Most events add a student; drop_ratio of them remove one. Half of the
+        events go to the first hot_fraction of course_ids, like popular
+        sections at the start of registration.
+        """
+        rng = random.Random(seed)
+        hot = course_ids[:max(1, int(len(course_ids) * hot_fraction))]
+        timestamp = 0.0
+        events = []
+        for _ in range(count):
+            timestamp += rng.expovariate(rate)
+            course_id = rng.choice(hot) if rng.random() < 0.5 else rng.choice(course_ids)
+            events.append(EnrollmentEvent(timestamp, course_id, -1 if rng.random() < drop_ratio else 1))
+        return cls(events, speed)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __iter__(self) -> Iterator[EnrollmentEvent]:
+        started = time.monotonic()
+        for event in self.events:
+            if self.speed:
+                wait = event.timestamp / self.speed - (time.monotonic() - started)
+                if wait > 0:
+                    time.sleep(wait)
+            yield event
+
+    def batches(self, batch_size: int = 1000) -> Iterator[List[EnrollmentEvent]]:
+        """Yield the events in lists of at most batch_size"""
+        batch = []
+        for event in self:
+            batch.append(event)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def replay(self, recommender, batch_size: int = 1000) -> int:
+        """Apply every event to a ClassRecommender, returning the number of events applied"""
+        applied = 0
+        for batch in self.batches(batch_size):
+            recommender.apply_enrollment_deltas((event.course_id, event.delta) for event in batch)
+            applied += len(batch)
+        return applied
@@ -0,0 +1,156 @@
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import IO, Iterable, Iterator, List, Union
+from zoneinfo import ZoneInfo
+from models import ClassMeeting, Course, Schedule, WEEKDAYS, meetings_of
+from instrumentation import stage
+
+
+def _escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _fold(line: str) -> str:
+    """Fold a content line at 75 octets as required by RFC 5545"""
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return line
+    parts = []
+    while len(data) > 75:
+        cut = 75 if not parts else 74
+        # Never split inside a multi-byte character
+        while cut > 0 and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[:cut].decode('utf-8'))
+        data = data[cut:]
+    parts.append(data.decode('utf-8'))
+    return '\r\n '.join(parts)
+
+
+def _vtimezone_lines(time_zone: str, start: date, end: date) -> List[str]:
+    """VTIMEZONE component for time_zone with the offset changes between start and end.
+
+    RFC 5545 requires one for every TZID used. Offsets are sampled every
+    15 minutes, which catches the transitions of every zone in use.
+    """
+    zone = ZoneInfo(time_zone)
+    step = timedelta(minutes=15)
+    instant = datetime.combine(start, datetime.min.time(), timezone.utc) - timedelta(days=1)
+    stop = datetime.combine(end, datetime.min.time(), timezone.utc) + timedelta(days=2)
+
+    def observance(local: datetime, onset: datetime, offset_from: timedelta) -> List[str]:
+        kind = 'DAYLIGHT' if local.dst() else 'STANDARD'
+        return [
+            f'BEGIN:{kind}',
+            f'DTSTART:{onset:%Y%m%dT%H%M%S}',
+            f'TZOFFSETFROM:{_utc_offset(offset_from)}',
+            f'TZOFFSETTO:{_utc_offset(local.utcoffset())}',
+            f'TZNAME:{local.tzname()}',
+            f'END:{kind}',
+        ]
+
+    # The observance in effect at the start of the term, as if it always had been
+    local = instant.astimezone(zone)
+    offset = local.utcoffset()
+    lines = ['BEGIN:VTIMEZONE', f'TZID:{time_zone}', *observance(local, datetime(1970, 1, 1), offset)]
+    while instant < stop:
+        instant += step
+        local = instant.astimezone(zone)
+        if local.utcoffset() != offset:
+            # An observance starts at the local time in effect just before it
+            lines += observance(local, (instant + offset).replace(tzinfo=None), offset)
+            offset = local.utcoffset()
+    lines.append('END:VTIMEZONE')
+    return lines
+
+
+def _utc_offset(offset: timedelta) -> str:
+    minutes = int(offset.total_seconds()) // 60
+    sign = '-' if minutes < 0 else '+'
+    return f'{sign}{abs(minutes) // 60:02d}{abs(minutes) % 60:02d}'
+
+
+class IcsExporter:
+    """Generates iCalendar (.ics) files for schedules without any network access.
+
+    Every course meeting becomes one weekly-recurring VEVENT for the length of
+    the term, with holidays that fall on it excluded through EXDATE.
+    Output is produced line by line so whole cohorts can be streamed to disk.
+    """
+
+    def __init__(self, semester_start_date: str, weeks: int = 16, time_zone: str = 'America/New_York',
+                 holidays: Iterable[Union[str, date]] = ()):
+        self.start_date = datetime.strptime(semester_start_date, '%Y-%m-%d').date()
+        self.weeks = weeks
+        self.time_zone = time_zone
+        self.holidays = sorted(
+            datetime.strptime(h, '%Y-%m-%d').date() if isinstance(h, str) else h for h in holidays
+        )
+        self.dtstamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        self.vtimezone = _vtimezone_lines(time_zone, self.start_date, self.start_date + timedelta(weeks=weeks + 1))
+
+    def iter_lines(self, schedule: Union[Schedule, Iterable[Course]], owner: str = '') -> Iterator[str]:
+        """Yield the folded content lines of a calendar for a schedule or list of courses"""
+        courses = schedule.courses if isinstance(schedule, Schedule) else schedule
+        if isinstance(schedule, Schedule) and not owner:
+            owner = schedule.student_id
+
+        yield 'BEGIN:VCALENDAR'
+        yield 'VERSION:2.0'
+        yield 'PRODID:-//Class Selection Assistant//Schedule Export//EN'
+        yield 'CALSCALE:GREGORIAN'
+        yield f'X-WR-TIMEZONE:{self.time_zone}'
+        yield from self.vtimezone
+        for course in courses:
+            for meeting in meetings_of(course):
+                if meeting.day in WEEKDAYS:
+                    yield from self._event_lines(course, meeting, owner)
+        yield 'END:VCALENDAR'
+
+    def _event_lines(self, course: Course, meeting: ClassMeeting, owner: str) -> Iterator[str]:
+        day_num = WEEKDAYS.index(meeting.day)
+        first_date = self.start_date + timedelta(days=(day_num - self.start_date.weekday()) % 7)
+        start = datetime.combine(first_date, meeting.start_time)
+        end = datetime.combine(first_date, meeting.end_time)
+        last_date = first_date + timedelta(weeks=self.weeks - 1)
+        tz = f'TZID={self.time_zone}'
+
+        yield 'BEGIN:VEVENT'
+        uid = f'{course.course_id}-{WEEKDAYS[day_num]}-{start:%H%M}'
+        yield f'UID:{uid}-{owner}@class-selection-assistant' if owner else f'UID:{uid}@class-selection-assistant'
+        yield f'DTSTAMP:{self.dtstamp}'
+        yield f'DTSTART;{tz}:{start:%Y%m%dT%H%M%S}'
+        yield f'DTEND;{tz}:{end:%Y%m%dT%H%M%S}'
+        yield f'RRULE:FREQ=WEEKLY;COUNT={self.weeks}'
+        excluded = [
+            datetime.combine(holiday, meeting.start_time)
+            for holiday in self.holidays
+            if first_date <= holiday <= last_date and holiday.weekday() == day_num
+        ]
+        if excluded:
+            yield _fold(f'EXDATE;{tz}:' + ','.join(f'{d:%Y%m%dT%H%M%S}' for d in excluded))
+        yield _fold(f'SUMMARY:{_escape(f"{course.course_name} ({course.course_id})")}')
+        yield _fold(f'LOCATION:{_escape(f"{course.building} {course.room}")}')
+        description = f'Professor: {course.professor}\nSubject: {course.subject}\nCredits: {course.credits}'
+        yield _fold(f'DESCRIPTION:{_escape(description)}')
+        yield 'END:VEVENT'
+
+    def write(self, schedule: Union[Schedule, Iterable[Course]], out: Union[str, IO[str]], owner: str = ''):
+        """Write a calendar to a path or text file object"""
+        if isinstance(out, str):
+            with open(out, 'w', encoding='utf-8', newline='') as f:
+                self.write(schedule, f, owner)
+            return
+        with stage('calendar_export'):
+            for line in self.iter_lines(schedule, owner):
+                out.write(line + '\r\n')
+
+    def write_cohort(self, schedules: Iterable[Schedule], directory: str) -> List[str]:
+        """Write one <student_id>.ics file per schedule and return the paths"""
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for schedule in schedules:
+            path = os.path.join(directory, f'{schedule.student_id}.ics')
+            self.write(schedule, path)
+            paths.append(path)
+        return paths
@@ -0,0 +1,196 @@
+"""Streaming ingestion of registrar catalog exports.
+
+Exports are read in chunks (CSV, JSON lines or Parquet), each row is
+validated and normalized, and the resulting Course records are either
+yielded one by one or written straight into the columnar catalog format.
+
+    python ingest.py export.csv catalog_dir
+"""
+import re
+import sys
+from datetime import time
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional
+from models import ClassMeeting, Course, WEEKDAYS
+from catalog_store import CatalogWriter
+import pandas as pd
+
+REQUIRED_COLUMNS = ['course_id', 'course_name', 'subject', 'credits', 'professor', 'time_slot',
+                    'days', 'campus', 'building', 'room', 'capacity']
+
+# An optional end_time column gives the class length; without it classes last an hour
+
+DAY_ALIASES = {
+    'm': 'Monday', 'mo': 'Monday', 'mon': 'Monday',
+    't': 'Tuesday', 'tu': 'Tuesday', 'tue': 'Tuesday', 'tues': 'Tuesday',
+    'w': 'Wednesday', 'we': 'Wednesday', 'wed': 'Wednesday',
+    'r': 'Thursday', 'th': 'Thursday', 'thu': 'Thursday', 'thur': 'Thursday', 'thurs': 'Thursday',
+    'f': 'Friday', 'fr': 'Friday', 'fri': 'Friday',
+    's': 'Saturday', 'sa': 'Saturday', 'sat': 'Saturday',
+    'u': 'Sunday', 'su': 'Sunday', 'sun': 'Sunday',
+    **{day.lower(): day for day in WEEKDAYS},
+}
+
+# Compact day codes such as "MWF", "TTh" or "TR", longest codes first
+_DAY_CODE = re.compile(r'Th|Tu|Sa|Su|[MTWRFSU]', re.IGNORECASE)
+_TIME = re.compile(r'^(\d{1,2})(?::?(\d{2}))?(?::\d{2})?\s*([ap]\.?m\.?)?$', re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def normalize_days(value: str) -> tuple:
+    """Turn a days cell such as 'Mon/Wed', 'Monday;Wednesday' or 'MWF' into full day names"""
+    days = []
+    for token in re.split(r'[\s,;/|]+', value.strip()):
+        if not token:
+            continue
+        day = DAY_ALIASES.get(token.lower().rstrip('.'))
+        if day:
+            days.append(day)
+        elif _DAY_CODE.sub('', token) == '':
+            days.extend(DAY_ALIASES[code.lower()] for code in _DAY_CODE.findall(token))
+        else:
+            raise ValueError(f"Unrecognized day: {token}")
+    if not days:
+        raise ValueError("No meeting days")
+    return tuple(sorted(set(days), key=WEEKDAYS.index))
+
+
+@lru_cache(maxsize=4096)
+def normalize_time(value: str) -> time:
+    """Parse a start time such as '9:00', '09:00:00', '2:30 PM' or '1400'"""
+    match = _TIME.match(value.strip())
+    if not match:
+        raise ValueError(f"Unrecognized time: {value}")
+    hour_text, minute_text, meridiem = match.groups()
+    hour, minute = int(hour_text), int(minute_text or 0)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            raise ValueError(f"Unrecognized time: {value}")
+        hour = hour % 12 + (12 if meridiem[0].lower() == 'p' else 0)
+    return time(hour, minute)
+
+
+def normalize_campus(value: str, aliases: Optional[Dict[str, str]] = None) -> str:
+    """Collapse whitespace and casing differences in campus names, applying any aliases"""
+    name = ' '.join(value.split())
+    if aliases:
+        name = aliases.get(name.lower(), name)
+    return name.title() if name.islower() or name.isupper() else name
+
+
+class CatalogIngester:
+    """Reads registrar exports chunk by chunk and yields validated Course records.
+
+    Invalid rows are skipped and counted, or raise ValueError when strict is set.
+    """
+
+    def __init__(self, chunksize: int = 50000, campus_aliases: Optional[Dict[str, str]] = None,
+                 strict: bool = False, max_errors: int = 100):
+        self.chunksize = chunksize
+        self.campus_aliases = {k.lower(): v for k, v in (campus_aliases or {}).items()}
+        self.strict = strict
+        self.max_errors = max_errors
+        self.rows = 0
+        self.rejected = 0
+        self.errors: List[str] = []
+
+    def read_chunks(self, source: str) -> Iterator[pd.DataFrame]:
+        """Yield the export as DataFrames of at most chunksize rows"""
+        if source.endswith('.parquet'):
+            try:
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("Reading Parquet exports requires pyarrow (pip install pyarrow)")
+            for batch in pq.ParquetFile(source).iter_batches(batch_size=self.chunksize):
+                yield batch.to_pandas()
+        elif source.endswith('.jsonl'):
+            yield from pd.read_json(source, lines=True, chunksize=self.chunksize, dtype=False)
+        elif source.endswith('.json'):
+            # Plain JSON arrays cannot be streamed, so only the row processing is chunked
+            frame = pd.read_json(source, dtype=False)
+            for start in range(0, len(frame), self.chunksize):
+                yield frame.iloc[start:start + self.chunksize]
+        else:
+            yield from pd.read_csv(source, chunksize=self.chunksize, dtype=str, keep_default_na=False)
+
+    def iter_courses(self, source: str) -> Iterator[Course]:
+        """Yield a normalized Course for every valid row of the export"""
+        for chunk in self.read_chunks(source):
+            missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+            if missing:
+                raise ValueError(f"Export is missing columns: {', '.join(missing)}")
+            names = list(chunk.columns)
+            # Column-wise tolist() is much cheaper than DataFrame.to_dict('records')
+            for values in zip(*(chunk[name].tolist() for name in names)):
+                row = dict(zip(names, values))
+                self.rows += 1
+                try:
+                    yield self.parse_row(row)
+                except (ValueError, TypeError, AttributeError) as e:
+                    if self.strict:
+                        raise ValueError(f"Row {self.rows}: {e}") from e
+                    self.rejected += 1
+                    if len(self.errors) < self.max_errors:
+                        self.errors.append(f"Row {self.rows}: {e}")
+
+    def parse_row(self, row: dict) -> Course:
+        """Validate and normalize a single export row"""
+        days = row['days']
+        days = list(normalize_days(days if isinstance(days, str) else ','.join(days)))
+        capacity = int(row['capacity'])
+        # JSON lines and Parquet exports fill rows that leave enrolled out with NaN
+        enrolled = row.get('enrolled')
+        enrolled = 0 if enrolled is None or pd.isna(enrolled) or not str(enrolled).strip() else int(enrolled)
+        credits = int(row['credits'])
+        if capacity <= 0:
+            raise ValueError(f"Invalid capacity: {capacity}")
+        if enrolled < 0:
+            raise ValueError(f"Invalid enrollment: {enrolled}")
+        if credits < 0:
+            raise ValueError(f"Invalid credits: {credits}")
+
+        course_id = str(row['course_id']).strip()
+        if not course_id:
+            raise ValueError("Missing course_id")
+
+        time_slot = normalize_time(str(row['time_slot']))
+        meetings = []
+        end_time = row.get('end_time')
+        if end_time is not None and not pd.isna(end_time) and str(end_time).strip():
+            end_time = normalize_time(str(end_time))
+            if end_time <= time_slot:
+                raise ValueError(f"Class ends before it starts: {end_time}")
+            meetings = [ClassMeeting(day, time_slot, end_time) for day in days]
+
+        return Course(
+            course_id=course_id,
+            course_name=str(row['course_name']).strip(),
+            subject=' '.join(str(row['subject']).split()),
+            credits=credits,
+            professor=str(row['professor']).strip(),
+            time_slot=time_slot,
+            days=days,
+            campus=normalize_campus(str(row['campus']), self.campus_aliases),
+            building=str(row['building']).strip(),
+            room=str(row['room']).strip(),
+            capacity=capacity,
+            enrolled=enrolled,
+            meetings=meetings
+        )
+
+    def ingest(self, source: str, path: str) -> int:
+        """Stream an export into a catalog directory, returning the number of courses written"""
+        with CatalogWriter(path, buffer_size=self.chunksize) as writer:
+            writer.add_all(self.iter_courses(source))
+        return writer.count
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python ingest.py <export.csv|export.jsonl|export.parquet> <catalog_dir>")
+        sys.exit(1)
+    ingester = CatalogIngester()
+    count = ingester.ingest(sys.argv[1], sys.argv[2])
+    print(f"Wrote {count} courses ({ingester.rejected} rows rejected)")
+    for error in ingester.errors:
+        print(f"- {error}")
@@ -0,0 +1,218 @@
+"""Lightweight timers and counters for the request pipeline.
+
+Stages are timed with the timed decorator or the stage context manager and
+events counted with count. Everything is off unless INSTRUMENTATION=1 is set
+or enable() is called; while off, an instrumented call only pays for one
+flag check.
+
+    registry.snapshot()         # dict of per-stage and counter stats
+    registry.prometheus_text()  # Prometheus text exposition format
+
+profile_request captures a cProfile of one request when asked to, whether
+or not timing is enabled.
+"""
+import cProfile
+import functools
+import inspect
+import io
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Optional, Tuple
+
+_enabled = os.getenv('INSTRUMENTATION') == '1'
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+class StageStats:
+    """Call count and durations of one stage"""
+    __slots__ = ('count', 'errors', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class Registry:
+    """Process-wide store of stage timings, counters and captured profiles"""
+
+    def __init__(self, max_profiles: int = 20):
+        self._lock = threading.Lock()
+        self.stages: Dict[str, StageStats] = {}
+        self.counters: Dict[str, int] = {}
+        # (name, pstats text) of the most recent profiled requests
+        self.profiles: Deque[Tuple[str, str]] = deque(maxlen=max_profiles)
+
+    def record(self, stage: str, seconds: float, failed: bool = False):
+        with self._lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = self.stages[stage] = StageStats()
+            stats.count += 1
+            stats.errors += failed
+            stats.total += seconds
+            if seconds > stats.max:
+                stats.max = seconds
+
+    def increment(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+            self.profiles.clear()
+
+    def snapshot(self) -> dict:
+        """Copy of the current stats, with durations in seconds"""
+        with self._lock:
+            return {
+                "stages": {
+                    stage: {
+                        "count": stats.count,
+                        "errors": stats.errors,
+                        "total_seconds": stats.total,
+                        "mean_seconds": stats.total / stats.count if stats.count else 0.0,
+                        "max_seconds": stats.max,
+                    }
+                    for stage, stats in self.stages.items()
+                },
+                "counters": dict(self.counters),
+            }
+
+    def prometheus_text(self, prefix: str = 'class_selector') -> str:
+        """Render the stats in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = [
+            f'# HELP {prefix}_stage_seconds Time spent in each pipeline stage.',
+            f'# TYPE {prefix}_stage_seconds summary',
+        ]
+        for stage, stats in sorted(snapshot["stages"].items()):
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {stats["total_seconds"]:.6f}')
+        lines += [
+            f'# HELP {prefix}_stage_max_seconds Slowest call of each pipeline stage.',
+            f'# TYPE {prefix}_stage_max_seconds gauge',
+        ]
+        for stage, stats in sorted(snapshot["stages"].items()):
+            lines.append(f'{prefix}_stage_max_seconds{{stage="{stage}"}} {stats["max_seconds"]:.6f}')
+        lines += [
+            f'# HELP {prefix}_stage_errors_total Calls of each pipeline stage that raised.',
+            f'# TYPE {prefix}_stage_errors_total counter',
+        ]
+        for stage, stats in sorted(snapshot["stages"].items()):
+            lines.append(f'{prefix}_stage_errors_total{{stage="{stage}"}} {stats["errors"]}')
+        lines += [
+            f'# HELP {prefix}_events_total Pipeline event counters.',
+            f'# TYPE {prefix}_events_total counter',
+        ]
+        for name, value in sorted(snapshot["counters"].items()):
+            lines.append(f'{prefix}_events_total{{name="{name}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def count(name: str, amount: int = 1):
+    """Add to an event counter"""
+    if _enabled:
+        registry.increment(name, amount)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block of code as a pipeline stage"""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        registry.record(name, time.perf_counter() - start, failed)
+
+
+def timed(name: str):
+    """Decorator timing every call of a function (or coroutine function) as a pipeline stage"""
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                failed = True
+                try:
+                    result = await func(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    registry.record(name, time.perf_counter() - start, failed)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                registry.record(name, time.perf_counter() - start, failed)
+        return wrapper
+    return decorate
+
+
+# cProfile can only have one active profiler per process
+_profile_lock = threading.Lock()
+
+
+@contextmanager
+def profile_request(name: str, enabled: Optional[bool] = None, limit: int = 40):
+    """Capture a cProfile of the block into registry.profiles when enabled.
+
+    enabled defaults to the PROFILE_REQUESTS environment variable being 1.
+    Only one request is profiled at a time; concurrent ones run unprofiled.
+    """
+    if enabled is None:
+        enabled = os.getenv('PROFILE_REQUESTS') == '1'
+    if not enabled or not _profile_lock.acquire(blocking=False):
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+        registry.profiles.append((name, out.getvalue()))
+    finally:
+        _profile_lock.release()
@@ -1,5 +1,5 @@
 from datetime import time
-from models import StudentPreferences, Course
+from models import StudentPreferences, Course, Schedule
 from recommender import ClassRecommender
 import json
 
@@ -75,12 +75,13 @@ class ClassSelectorInterface:
         print("\nRecommended Courses:")
         print("-" * 80)
         for course in recommendations:
+            display = self.recommender.catalog.display_of(course)
             print(f"\nCourse: {course.course_name} ({course.course_id})")
             print(f"Subject: {course.subject}")
             print(f"Professor: {course.professor}")
-            print(f"Time: {course.time_slot.strftime('%I:%M %p')}")
-            print(f"Days: {', '.join(course.days)}")
-            print(f"Location: {course.building} {course.room}")
+            print(f"Time: {display.time}")
+            print(f"Days: {display.days}")
+            print(f"Location: {display.location}")
             print(f"Credits: {course.credits}")
             print(f"Availability: {course.capacity - course.enrolled}/{course.capacity}")
             print("-" * 80)
@@ -94,7 +95,7 @@ class ClassSelectorInterface:
         for day, classes in summary['daily_schedule'].items():
             print(f"\n{day}:")
             for class_info in classes:
-                print(f"  {class_info['time']} - {class_info['course']}")
+                print(f"  {class_info['time']}-{class_info['end_time']} - {class_info['course']}")
                 print(f"    Location: {class_info['location']}")
 
     def run(self):
@@ -111,7 +112,7 @@ class ClassSelectorInterface:
                     student_id="current",
                     courses=recommendations,
                     total_credits=sum(c.credits for c in recommendations),
-                    commute_time=0  # This would be calculated based on actual locations
+                    commute_time=self.recommender.commute_time(recommendations)
                 )
             )
             self.display_schedule_summary(schedule) 
\ No newline at end of file
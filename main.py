@@ -1,6 +1,6 @@
 from models import Course
 from recommender import ClassRecommender
-from chat_interface import ChatInterface
+from chat_interface import ChatInterface, ChatSession
 from datetime import time
 
 def create_sample_courses():
@@ -86,12 +86,13 @@ def main():
     recommender = ClassRecommender(courses)
     
     # Initialize the chat interface
-    chat_interface = ChatInterface()
+    chat_interface = ChatInterface(subjects=recommender.catalog.subjects, campuses=recommender.catalog.campuses)
     
     print("Welcome to the AI Class Selection Assistant!")
     print("You can tell me your preferences in natural language, and I'll help you find the best classes.")
     print("For example, you can say: 'I prefer morning classes on Monday and Wednesday, with a maximum of 2 classes per day.'")
     print("Type 'quit' to exit.\n")
+    session = ChatSession(chat_interface)
     
     while True:
         user_input = input("What are your preferences for this semester? ")
@@ -100,7 +101,7 @@ def main():
             print("Goodbye!")
             break
             
-        preferences, questions = chat_interface.chat(user_input)
+        preferences, questions = session.send(user_input)
         
         if questions:
             print("\nI need some more information:")
@@ -112,6 +113,7 @@ def main():
             print("I'm sorry, I couldn't understand your preferences. Please try again.")
             continue
             
+        session.reset()
         required_credits = int(input("\nHow many credits do you need to take? "))
         
         recommendations = recommender.recommend_courses(preferences, required_credits)
@@ -119,10 +121,11 @@ def main():
         if recommendations:
             print("\nBased on your preferences, here are the recommended courses:")
             for course in recommendations:
+                display = recommender.catalog.display_of(course)
                 print(f"\n{course.course_name} ({course.course_id})")
-                print(f"Time: {course.time_slot.strftime('%I:%M %p')}")
-                print(f"Days: {', '.join(course.days)}")
-                print(f"Location: {course.building} {course.room}")
+                print(f"Time: {display.time}")
+                print(f"Days: {display.days}")
+                print(f"Location: {display.location}")
                 print(f"Professor: {course.professor}")
                 print(f"Credits: {course.credits}")
                 print(f"Availability: {course.capacity - course.enrolled}/{course.capacity}")
@@ -1,7 +1,15 @@
-from dataclasses import dataclass
-from typing import List, Optional
+import sys
+from bisect import insort
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from datetime import time
 
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Length of a class when a course only has a time_slot
+DEFAULT_CLASS_MINUTES = 60
+
 @dataclass
 class StudentPreferences:
     """Represents a student's preferences for class selection"""
@@ -13,6 +21,13 @@ class StudentPreferences:
     min_gap_between_classes: int  # in minutes
     preferred_campus: Optional[str] = None
 
+@dataclass(frozen=True)
+class ClassMeeting:
+    """A weekly meeting of a course, e.g. a lecture or a lab"""
+    day: str
+    start_time: time
+    end_time: time
+
 @dataclass
 class Course:
     """Represents a course offering"""
@@ -28,6 +43,118 @@ class Course:
     room: str
     capacity: int
     enrolled: int = 0
+    # When empty, the course meets on each of its days at time_slot for DEFAULT_CLASS_MINUTES
+    meetings: List[ClassMeeting] = field(default_factory=list)
+
+def meetings_of(course) -> List[ClassMeeting]:
+    """Weekly meetings of a course, derived from time_slot and days when not given explicitly"""
+    if course.meetings:
+        return list(course.meetings)
+    start = course.time_slot.hour * 60 + course.time_slot.minute
+    end = min(start + DEFAULT_CLASS_MINUTES, 24 * 60 - 1)
+    end_time = time(end // 60, end % 60)
+    return [ClassMeeting(day, course.time_slot, end_time) for day in course.days]
+
+@lru_cache(maxsize=None)
+def format_time(value: time) -> str:
+    """Display form of a class time, e.g. 09:30 AM (cached, as catalogs reuse few distinct times)"""
+    return value.strftime("%I:%M %p")
+
+@dataclass(frozen=True)
+class CourseDisplay:
+    """Formatted fields of a course shown by the summaries and UIs, computed once per course"""
+    time: str
+    days: str
+    location: str
+    # (day, start minute, start, end) per weekly meeting
+    meetings: Tuple[Tuple[str, int, str, str], ...]
+
+    @classmethod
+    def of(cls, course) -> 'CourseDisplay':
+        return cls(
+            time=format_time(course.time_slot),
+            days=', '.join(course.days),
+            location=f"{course.building} {course.room}",
+            meetings=tuple(
+                (meeting.day, meeting.start_time.hour * 60 + meeting.start_time.minute,
+                 format_time(meeting.start_time), format_time(meeting.end_time))
+                for meeting in meetings_of(course)
+            )
+        )
+
+def _shared(value, table: Dict[object, object]):
+    """The instance of value already in table, adding value if it is new"""
+    return table.setdefault(value, value)
+
+@dataclass(frozen=True, slots=True)
+class CompactCourse:
+    """Memory-efficient, immutable course offering for large catalogs.
+
+    Categorical fields and day patterns are shared between instances, and
+    days is a tuple so it can be reused by every section meeting on the same days.
+    """
+    course_id: str
+    course_name: str
+    subject: str
+    credits: int
+    professor: str
+    time_slot: time
+    days: Tuple[str, ...]
+    campus: str
+    building: str
+    room: str
+    capacity: int
+    enrolled: int = 0
+    meetings: Tuple[ClassMeeting, ...] = ()
+
+    @classmethod
+    def from_course(cls, course: Course, shared: Optional[Dict[object, object]] = None) -> 'CompactCourse':
+        """Convert a Course into a CompactCourse with interned fields.
+
+        Strings go through sys.intern; times, day patterns and meetings are
+        shared through the shared table, which callers converting many
+        courses pass to every call (see from_courses) and drop afterwards.
+        """
+        shared = {} if shared is None else shared
+        return cls(
+            course_id=course.course_id,
+            course_name=sys.intern(course.course_name),
+            subject=sys.intern(course.subject),
+            credits=course.credits,
+            professor=sys.intern(course.professor),
+            time_slot=_shared(course.time_slot, shared),
+            days=_shared(tuple(sys.intern(day) for day in course.days), shared),
+            campus=sys.intern(course.campus),
+            building=sys.intern(course.building),
+            room=sys.intern(course.room),
+            capacity=course.capacity,
+            enrolled=course.enrolled,
+            meetings=_shared(tuple(_shared(meeting, shared) for meeting in course.meetings), shared)
+        )
+
+    @classmethod
+    def from_courses(cls, courses: Iterable[Course]) -> List['CompactCourse']:
+        """Convert many courses, sharing repeated values between them but not with other conversions"""
+        shared: Dict[object, object] = {}
+        return [cls.from_course(course, shared) for course in courses]
+
+    def to_course(self) -> Course:
+        """Convert back into a mutable Course"""
+        return Course(
+            course_id=self.course_id,
+            course_name=self.course_name,
+            subject=self.subject,
+            credits=self.credits,
+            professor=self.professor,
+            time_slot=self.time_slot,
+            days=list(self.days),
+            campus=self.campus,
+            building=self.building,
+            room=self.room,
+            capacity=self.capacity,
+            enrolled=self.enrolled,
+            meetings=list(self.meetings)
+        )
 
 @dataclass
 class Schedule:
@@ -35,4 +162,89 @@ class Schedule:
     student_id: str
     courses: List[Course]
     total_credits: int
-    commute_time: int  # in minutes 
\ No newline at end of file
+    commute_time: int  # in minutes
+
+    def __post_init__(self):
+        # Not a field, so asdict, comparisons and repr only see the schedule itself
+        self._daily: Optional[_DailyView] = None
+
+    def add_course(self, course: Course, display: Optional[CourseDisplay] = None):
+        """Add a course, updating the credits and daily view in place"""
+        self.courses.append(course)
+        self.total_credits += course.credits
+        if self._daily is not None and self._daily.built_from(self.courses[:-1]):
+            self._daily.insert(course, display or CourseDisplay.of(course))
+
+    def remove_course(self, course: Course):
+        """Remove a course (raises ValueError if it isn't in the schedule), updating the daily view in place"""
+        position = next((i for i, c in enumerate(self.courses) if c is course), None)
+        if position is None:
+            position = self.courses.index(course)
+        course = self.courses[position]
+        in_sync = self._daily is not None and self._daily.built_from(self.courses)
+        del self.courses[position]
+        self.total_credits -= course.credits
+        if in_sync:
+            self._daily.remove(position)
+
+    def daily_schedule(self, display_of: Callable[[Course], CourseDisplay] = CourseDisplay.of
+                       ) -> Dict[str, List[Dict[str, str]]]:
+        """Each day's meetings in start time order, days in week order.
+
+        The view is rebuilt only if courses was changed other than through
+        add_course and remove_course.
+        """
+        if self._daily is None or not self._daily.built_from(self.courses):
+            self._daily = _DailyView()
+            for course in self.courses:
+                self._daily.insert(course, display_of(course))
+        return self._daily.render()
+
+
+# Keys of a daily schedule entry, in the order _DailyView stores their values
+DAILY_ENTRY_KEYS = ("course", "time", "end_time", "location")
+
+
+class _DailyView:
+    """A schedule's meetings per day, kept in start time order as courses are added and removed"""
+
+    def __init__(self):
+        # (start, sequence, token, entry values) per day; the values are shared, so they are kept as tuples
+        self.days: Dict[str, list] = {}
+        # (course, token) for every course in the view, in the order of Schedule.courses
+        self.courses: List[Tuple[Course, int]] = []
+        self.added = 0
+
+    def built_from(self, courses: List[Course]) -> bool:
+        """Whether the view was built from exactly these courses"""
+        return len(courses) == len(self.courses) and all(a is b for a, (b, _) in zip(courses, self.courses))
+
+    def insert(self, course: Course, display: CourseDisplay):
+        self.added += 1
+        token = self.added
+        self.courses.append((course, token))
+        for day, start, start_text, end_text in display.meetings:
+            self.added += 1
+            # The sequence number keeps meetings that start together in the order they were added
+            insort(self.days.setdefault(day, []),
+                   (start, self.added, token, (course.course_name, start_text, end_text, display.location)))
+
+    def remove(self, position: int):
+        _, token = self.courses.pop(position)
+        for day in [day for day, entries in self.days.items() if any(e[2] == token for e in entries)]:
+            entries = [entry for entry in self.days[day] if entry[2] != token]
+            if entries:
+                self.days[day] = entries
+            else:
+                del self.days[day]
+
+    def render(self) -> Dict[str, List[Dict[str, str]]]:
+        """New dicts and lists, so callers may change or serialize them freely"""
+        return {
+            day: [dict(zip(DAILY_ENTRY_KEYS, entry[3])) for entry in self.days[day]]
+            for day in sorted(self.days, key=_day_order)
+        }
+
+
+def _day_order(day: str) -> int:
+    return WEEKDAYS.index(day) if day in WEEKDAYS else len(WEEKDAYS) 
\ No newline at end of file
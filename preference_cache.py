@@ -0,0 +1,117 @@
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+
+class PreferenceCache(ABC):
+    """Base class for caches of parsed preference dicts, keyed on normalized input text"""
+
+    def __init__(self, ttl: Optional[float] = 3600):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # Guards the entries in subclasses as well as the hit counters
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(user_input: str, prompt_version: str) -> str:
+        """Key for an input, ignoring case, whitespace and trailing punctuation"""
+        normalized = ' '.join(user_input.lower().split()).rstrip('.!? ')
+        return hashlib.sha256(f"{prompt_version}\n{normalized}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        value = self._get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: dict):
+        self._set(key, value)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[dict]:
+        """The cached value for key, or None when missing or expired"""
+
+    @abstractmethod
+    def _set(self, key: str, value: dict):
+        """Store value under key"""
+
+
+class MemoryPreferenceCache(PreferenceCache):
+    """In-process LRU cache with a time-to-live per entry"""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 3600):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+
+    def _get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        # Stored and returned as deep copies, so no caller's dict is shared with the cache
+        return copy.deepcopy(value)
+
+    def _set(self, key: str, value: dict):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLitePreferenceCache(PreferenceCache):
+    """On-disk cache shared between processes and restarts"""
+
+    def __init__(self, path: str = "preference_cache.sqlite3", ttl: Optional[float] = 7 * 24 * 3600):
+        super().__init__(ttl)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS preferences (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)"
+            )
+
+    def _get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires FROM preferences WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires = row
+        if expires is not None and expires < time.time():
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM preferences WHERE key = ?", (key,))
+            return None
+        return json.loads(value)
+
+    def _set(self, key: str, value: dict):
+        expires = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO preferences (key, value, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires)
+            )
+
+    def close(self):
+        self._conn.close()
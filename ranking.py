@@ -0,0 +1,42 @@
+from typing import Iterator
+import numpy as np
+
+
+def top_k_order(values: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k largest values, in the same order as np.argsort(-values, kind='stable')[:k].
+
+    Costs O(n + k log k) instead of a full O(n log n) sort.
+    """
+    n = len(values)
+    if k >= n:
+        return np.argsort(-values, kind='stable')
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    # Everything at least as large as the k-th largest value, so ties with it are ordered by position
+    threshold = np.partition(values, n - k)[n - k]
+    top = np.flatnonzero(values >= threshold)
+    order = top[np.argsort(-values[top], kind='stable')]
+    return order[:k]
+
+
+def iter_ranked(values: np.ndarray, first_batch: int = 64) -> Iterator[int]:
+    """Yield positions in descending order of value (ties by position), sorting only what is consumed.
+
+    Positions come out in exactly the order of np.argsort(-values, kind='stable').
+    Each batch is twice the size of the previous one, so a consumer that
+    stops early pays for little more than one partition of the array.
+    """
+    remaining = np.arange(len(values))
+    remaining_values = values
+    batch = first_batch
+    while len(remaining):
+        if batch >= len(remaining):
+            yield from remaining[np.argsort(-remaining_values, kind='stable')].tolist()
+            return
+        threshold = np.partition(remaining_values, len(remaining) - batch)[len(remaining) - batch]
+        taken = remaining_values >= threshold
+        top = np.flatnonzero(taken)
+        yield from remaining[top[np.argsort(-remaining_values[top], kind='stable')]].tolist()
+        remaining = remaining[~taken]
+        remaining_values = remaining_values[~taken]
+        batch *= 2
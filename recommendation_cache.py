@@ -0,0 +1,133 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Set
+from models import Course, StudentPreferences
+from catalog import day_mask
+
+# Rough per-entry bookkeeping cost on top of the key and value (OrderedDict node, entry tuple)
+ENTRY_OVERHEAD = 200
+# Rough cost of each id an entry depends on (its int and its slot in the id's set of dependents)
+DEPENDENCY_OVERHEAD = 64
+
+
+def make_key(preferences: StudentPreferences, required_credits: int, *options) -> Hashable:
+    """Canonical form of a request: preferences that recommend the same courses get the same key.
+
+    Order and duplicates in the preference lists, and unknown day names,
+    don't change the recommendation, so they are normalized away.
+    """
+    return (
+        tuple(sorted({t.hour * 60 + t.minute for t in preferences.preferred_time_slots if t is not None})),
+        day_mask(preferences.preferred_days),
+        tuple(sorted(set(preferences.preferred_subjects))),
+        preferences.preferred_campus or None,
+        preferences.max_classes_per_day,
+        preferences.min_gap_between_classes,
+        preferences.max_commute_time,
+        required_credits,
+        *options,
+    )
+
+
+class RecommendationCache:
+    """In-process LRU cache of recommended schedules, bounded by entry count and estimated memory.
+
+    Every entry lists the ids it depends on (the candidate cells, see
+    CandidateIndex, whose courses could reach its selection), or None when
+    any change can alter it. invalidate moves the cache to a newer catalog
+    version (see CourseCatalog.changes_since), dropping only the entries
+    that depend on the ids changed. Results computed against an older
+    version than the cache's are never stored.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self._entries: OrderedDict = OrderedDict()  # key -> (size, courses, ids depended on or None)
+        self._dependents: Dict[int, Set[Hashable]] = {}
+        self._depend_on_all: Set[Hashable] = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[List[Course]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # A new list per hit, as the cached tuple is shared by every request with this key
+        return list(entry[1])
+
+    def set(self, key: Hashable, version: int, courses: Sequence[Course],
+            depends_on: Optional[Iterable[int]] = None):
+        value = tuple(courses)
+        ids = None if depends_on is None else tuple(int(i) for i in depends_on)
+        size = (sys.getsizeof(key) + sys.getsizeof(value) + ENTRY_OVERHEAD
+                + (0 if ids is None else sys.getsizeof(ids) + len(ids) * DEPENDENCY_OVERHEAD))
+        with self._lock:
+            if version != self.version or size > self.max_bytes:
+                return
+            self._pop(key)
+            self._entries[key] = (size, value, ids)
+            self.bytes += size
+            if ids is None:
+                self._depend_on_all.add(key)
+            else:
+                for i in ids:
+                    self._dependents.setdefault(i, set()).add(key)
+            while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+                self._pop(next(iter(self._entries)))
+
+    def invalidate(self, version: int, changed: Optional[Iterable[int]]):
+        """Move to a newer version, dropping the entries that depend on the changed ids (all when None)"""
+        with self._lock:
+            if version <= self.version:
+                # Another caller already caught up further, dropping at least these entries
+                return
+            self.version = version
+            if changed is None:
+                stale = list(self._entries)
+            else:
+                stale = set(self._depend_on_all)
+                for i in changed:
+                    stale.update(self._dependents.get(int(i), ()))
+            for key in stale:
+                self._pop(key)
+            self.invalidated += len(stale)
+
+    def _pop(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        size, _, ids = entry
+        self.bytes -= size
+        if ids is None:
+            self._depend_on_all.discard(key)
+            return
+        for i in ids:
+            keys = self._dependents[i]
+            keys.discard(key)
+            if not keys:
+                del self._dependents[i]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dependents.clear()
+            self._depend_on_all.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0,
+                "invalidated": self.invalidated, "entries": len(self._entries), "bytes": self.bytes}
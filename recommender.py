@@ -1,11 +1,77 @@
-from typing import List, Dict
-from datetime import time, datetime
-from models import StudentPreferences, Course, Schedule
+from typing import Iterable, List, Dict, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import time
+from models import StudentPreferences, Course, Schedule, meetings_of
+from catalog import CourseCatalog, course_meetings
+from commute import CommuteModel
+from candidates import CandidateIndex
+from schedule_search import ScheduleSearch
+from constraints import DailyLoad
+from instrumentation import timed
+from ranking import iter_ranked
+from recommendation_cache import RecommendationCache, make_key
 import numpy as np
 
 class ClassRecommender:
-    def __init__(self, available_courses: List[Course]):
+    def __init__(self, available_courses: Sequence[Course], catalog: Optional[CourseCatalog] = None,
+                 commute: Optional[CommuteModel] = None, result_cache: Optional[RecommendationCache] = None):
         self.available_courses = available_courses
+        self.catalog = catalog if catalog is not None else CourseCatalog(available_courses)
+        # Travel minutes between building codes; without a commute model travel is not checked
+        self.travel = commute.matrix(self.catalog) if commute is not None else None
+        self.candidates = CandidateIndex(self.catalog)
+        # Set by SeatReservations when tentative seat holds are in use
+        self.reservations = None
+        # Set to None to always recompute recommendations
+        self.result_cache = result_cache if result_cache is not None else RecommendationCache()
+
+    def __getstate__(self):
+        # Locks can't be pickled; worker processes see the seats held when the pool started via catalog.held
+        state = self.__dict__.copy()
+        state['reservations'] = None
+        state['result_cache'] = None
+        return state
+
+    @classmethod
+    def from_catalog(cls, catalog: CourseCatalog, commute: Optional[CommuteModel] = None) -> 'ClassRecommender':
+        """Create a recommender over an existing (e.g. memory-mapped) catalog"""
+        return cls(catalog.courses, catalog, commute)
+
+    def apply_enrollment(self, course_id: str, delta: int) -> bool:
+        """Apply a change in enrollment (positive for added students) to one course.
+
+        Returns False when the course is not in the catalog or delta is 0, as nothing changes.
+        """
+        return len(self.apply_enrollment_deltas([(course_id, delta)])) > 0
+
+    def apply_enrollment_deltas(self, deltas: Iterable[Tuple[str, int]]) -> np.ndarray:
+        """Apply a batch of (course_id, delta) enrollment changes in place.
+
+        The catalog's enrollment column is updated without rebuilding it,
+        cached rankings that depend on the changed rows are dropped, and the
+        candidate cells refresh the availability they rank courses by.
+        Unknown course ids are ignored. Returns the catalog rows that changed.
+        """
+        rows, values = [], []
+        for course_id, delta in deltas:
+            row = self.catalog.row_of(course_id)
+            if row is not None and delta:
+                rows.append(row)
+                values.append(delta)
+        if not rows:
+            return np.empty(0, dtype=np.int64)
+        if self.reservations is not None:
+            # Under the reservation locks, so the change can't race with a seat check in hold()
+            return self.reservations.apply_enrollment(np.array(rows), np.array(values))
+        return self._update_enrollment(np.array(rows), np.array(values))
+
+    def _update_enrollment(self, rows: np.ndarray, deltas: np.ndarray) -> np.ndarray:
+        return self.catalog.update_enrollment(rows, deltas)
+
+    def _expire_holds(self):
+        """Give back seats whose holds ran out, so they are offered again"""
+        if self.reservations is not None:
+            self.reservations.purge_expired()
 
     def calculate_course_score(self, course: Course, preferences: StudentPreferences) -> float:
         """Calculate a score for a course based on student preferences"""
@@ -15,8 +81,8 @@ class ClassRecommender:
         if course.time_slot in preferences.preferred_time_slots:
             score += 2.0
         
-        # Day preference
-        for day in course.days:
+        # Day preference, counting every day the course meets on
+        for day in dict.fromkeys(meeting.day for meeting in meetings_of(course)):
             if day in preferences.preferred_days:
                 score += 1.0
         
@@ -28,93 +94,247 @@ class ClassRecommender:
         if preferences.preferred_campus and course.campus == preferences.preferred_campus:
             score += 2.0
         
-        # Class capacity (prefer classes with more available spots)
-        availability_ratio = (course.capacity - course.enrolled) / course.capacity
+        # Class capacity (prefer classes with more available spots), counting seats held for other students.
+        # Catalog courses read the live enrollment column, as frozen CompactCourse rows are never updated
+        row = self.catalog.row_of(course.course_id)
+        enrolled = course.enrolled if row is None else int(self.catalog.enrolled[row])
+        taken = min(max(enrolled, 0), course.capacity)
+        if self.reservations is not None and row is not None:
+            taken += int(self.reservations.held[row])
+        availability_ratio = (course.capacity - taken) / course.capacity
         score += availability_ratio * 2.0
         
         return score
 
+    def score_courses(self, preferences: StudentPreferences) -> np.ndarray:
+        """Score the whole catalog at once, in the same order as available_courses"""
+        return self.catalog.score(preferences)
+
     def check_schedule_conflicts(self, schedule: Schedule, new_course: Course) -> bool:
         """Check if adding a new course would create conflicts with existing schedule"""
-        for existing_course in schedule.courses:
-            # Check day conflicts
-            if any(day in existing_course.days for day in new_course.days):
-                # Check time conflicts
-                existing_start = datetime.combine(datetime.today(), existing_course.time_slot)
-                new_start = datetime.combine(datetime.today(), new_course.time_slot)
-                
-                # Assuming each class is 1 hour long
-                existing_end = existing_start.replace(hour=existing_start.hour + 1)
-                new_end = new_start.replace(hour=new_start.hour + 1)
-                
-                if (new_start < existing_end and new_end > existing_start):
-                    return True
-        return False
-
-    def recommend_courses(self, preferences: StudentPreferences, required_credits: int) -> List[Course]:
-        """Generate course recommendations based on student preferences"""
-        recommended_courses = []
-        current_schedule = Schedule(
-            student_id="temp",
-            courses=[],
-            total_credits=0,
-            commute_time=0
-        )
-        
-        # Sort courses by score
-        scored_courses = [
-            (course, self.calculate_course_score(course, preferences))
-            for course in self.available_courses
+        return bool(self.schedule_occupancy(schedule) & self.catalog.time_mask(new_course))
+
+    def schedule_occupancy(self, schedule: Schedule) -> int:
+        """Combined weekly occupancy mask of all courses in a schedule"""
+        occupied = 0
+        for course in schedule.courses:
+            occupied |= self.catalog.time_mask(course)
+        return occupied
+
+    def commute_time(self, courses: List[Course]) -> int:
+        """Total weekly travel time between back-to-back classes of a schedule, in minutes"""
+        if self.travel is None:
+            return 0
+        daily = {}
+        for course in courses:
+            building = self.catalog.building_index.get(course.building, -1)
+            for day, start, _ in course_meetings(course):
+                daily.setdefault(day, []).append((start, building))
+
+        total = 0
+        for meetings in daily.values():
+            meetings.sort()
+            for (_, origin), (_, destination) in zip(meetings, meetings[1:]):
+                if origin >= 0 and destination >= 0:
+                    total += int(self.travel[origin, destination])
+        return total
+
+    def recommend_courses(self, preferences: StudentPreferences, required_credits: int,
+                          optimal: bool = False, full_scan: bool = False) -> List[Course]:
+        """Generate course recommendations based on student preferences.
+
+        Courses are scored a candidate cell at a time, best possible score
+        first (see CandidateIndex), until the selection has enough credits;
+        full_scan scores the whole catalog up front instead. Both ways give
+        the same result.
+
+        With optimal set, the best schedule search_schedules finds with its
+        default candidate and time limits is returned (best effort, see
+        search_schedules), falling back to the greedy selection when the
+        search finds none.
+
+        Results are cached per canonical request until enrollment or seat
+        holds change in a course that could alter them.
+        """
+        self._expire_holds()
+        if self.result_cache is None:
+            return self._recommend(preferences, required_credits, optimal, full_scan)[0]
+        # full_scan doesn't change the result, so both ways share cache entries
+        key = make_key(preferences, required_credits, optimal)
+        # Caught up before computing, so a result that races with an enrollment change is never stored as current
+        version = self._sync_result_cache()
+        courses = self.result_cache.get(key)
+        if courses is None:
+            courses, floor = self._recommend(preferences, required_credits, optimal, full_scan)
+            depends_on = None if floor is None else self.candidates.cells_reaching(preferences, floor)
+            self.result_cache.set(key, version, courses, depends_on)
+        return courses
+
+    def _sync_result_cache(self) -> int:
+        """Bring the result cache up to the catalog version, dropping the entries the changes could alter"""
+        version, rows = self.catalog.changes_since(self.result_cache.version)
+        if version != self.result_cache.version:
+            self.result_cache.invalidate(version, None if rows is None else self.candidates.cell_of[rows].tolist())
+        return version
+
+    def _recommend(self, preferences: StudentPreferences, required_credits: int, optimal: bool,
+                   full_scan: bool) -> Tuple[List[Course], Optional[float]]:
+        """The recommended courses and the score of the last one picked.
+
+        No course scoring below that (whatever its availability) can change
+        the selection. The score is None when every course was considered,
+        including for the optimal search.
+        """
+        if optimal:
+            scores = self.score_courses(preferences)
+            schedules = self._search(scores, preferences, required_credits, top_k=1)
+            if schedules:
+                return schedules[0][1], None
+            return self._select_courses(scores, preferences, required_credits), None
+
+        ranked = iter_ranked(self.score_courses(preferences)) if full_scan else self.candidates.ranked_rows(preferences)
+        rows = self._select_rows(ranked, preferences, required_credits)
+        courses = [self.available_courses[i] for i in rows]
+        if int(self.catalog.credits[rows].sum()) < required_credits:
+            return courses, None
+        floor = float(self.catalog.score(preferences, np.array(rows[-1:]))[0]) if rows else float('inf')
+        return courses, floor
+
+    def search_schedules(self, preferences: StudentPreferences, required_credits: int, top_k: int = 5,
+                         max_credits: Optional[int] = None, time_limit: float = 0.05,
+                         max_candidates: Optional[int] = 300) -> List[Tuple[float, List[Course]]]:
+        """Find up to top_k high scoring schedules, best effort.
+
+        Schedules must reach required_credits without exceeding max_credits
+        (defaults to required_credits) and respect conflicts, the daily class
+        limit and the minimum gap between classes. Returns (total score, courses)
+        pairs, best first.
+
+        Only the max_candidates courses with the best score per credit are
+        considered (None considers every course), and the search returns what
+        it has found when time_limit seconds run out, so the results are the
+        highest scoring schedules only when neither limit cuts the search short.
+        """
+        self._expire_holds()
+        scores = self.score_courses(preferences)
+        return self._search(scores, preferences, required_credits, top_k, max_credits, time_limit, max_candidates)
+
+    def _search(self, scores: np.ndarray, preferences: StudentPreferences, required_credits: int, top_k: int,
+                max_credits: Optional[int] = None, time_limit: float = 0.05,
+                max_candidates: Optional[int] = 300) -> List[Tuple[float, List[Course]]]:
+        search = ScheduleSearch(self.catalog, scores, preferences, required_credits, max_credits=max_credits,
+                                top_k=top_k, max_candidates=max_candidates, time_limit=time_limit,
+                                travel=self.travel)
+        return [
+            (score, [self.available_courses[i] for i in indices])
+            for score, indices in search.run()
         ]
-        scored_courses.sort(key=lambda x: x[1], reverse=True)
-        
-        for course, score in scored_courses:
-            if current_schedule.total_credits >= required_credits:
+
+    def recommend_batch(self, preferences_list: List[StudentPreferences], required_credits: int,
+                        processes: Optional[int] = None, chunk_size: int = 256) -> List[List[Course]]:
+        """Generate recommendations for many students, scoring them against the catalog as a matrix.
+
+        With processes set, chunks of students are spread over a process pool
+        that receives the recommender once per worker.
+        """
+        self._expire_holds()
+        chunks = [preferences_list[i:i + chunk_size] for i in range(0, len(preferences_list), chunk_size)]
+        if not processes:
+            return [courses for chunk in chunks for courses in self._recommend_chunk(chunk, required_credits)]
+
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(self,)) as pool:
+            results = pool.map(_recommend_chunk_in_worker, chunks, [required_credits] * len(chunks))
+            return [courses for chunk_result in results for courses in chunk_result]
+
+    def _recommend_chunk(self, preferences_list: List[StudentPreferences], required_credits: int) -> List[List[Course]]:
+        """Score a chunk of students in one matrix operation and select courses for each"""
+        scores = self.catalog.score_batch(preferences_list)
+        return [
+            self._select_courses(row, preferences, required_credits)
+            for row, preferences in zip(scores, preferences_list)
+        ]
+
+    def _select_courses(self, scores: np.ndarray, preferences: StudentPreferences,
+                        required_credits: int) -> List[Course]:
+        """Greedily pick the best scoring non-conflicting courses until the credit requirement is met"""
+        rows = self._select_rows(iter_ranked(scores), preferences, required_credits)
+        return [self.available_courses[i] for i in rows]
+
+    @timed('selection')
+    def _select_rows(self, ranked: Iterable[int], preferences: StudentPreferences,
+                     required_credits: int) -> List[int]:
+        """Catalog rows of the courses picked from ranked (catalog rows, best first), in the order they were picked"""
+        selected = []
+        total_credits = 0
+
+        occupied = 0
+        reservations = self.reservations
+        daily_load = DailyLoad(preferences.max_classes_per_day, preferences.min_gap_between_classes,
+                               self.travel, preferences.max_commute_time)
+
+        # Courses are only looked up by row, so column-backed catalogs are not materialized
+        for i in ranked:
+            if total_credits >= required_credits:
                 break
-                
-            # Check if adding this course would exceed daily class limit
-            daily_classes = {}
-            for c in current_schedule.courses + [course]:
-                for day in c.days:
-                    daily_classes[day] = daily_classes.get(day, 0) + 1
-                    if daily_classes[day] > preferences.max_classes_per_day:
-                        continue
-            
-            # Check for schedule conflicts
-            if not self.check_schedule_conflicts(current_schedule, course):
-                recommended_courses.append(course)
-                current_schedule.courses.append(course)
-                current_schedule.total_credits += course.credits
-        
-        return recommended_courses
 
+            # Skip courses whose remaining seats are all held by other students
+            if reservations is not None and reservations.seats_left(i) < 1:
+                continue
+
+            # Check for schedule conflicts against the occupancy of the courses picked so far
+            mask = self.catalog.time_masks[i]
+            if occupied & mask:
+                continue
+
+            # Check the daily class limit, the minimum gap between classes and travel between buildings
+            meetings = self.catalog.meetings[i]
+            building = int(self.catalog.building_codes[i])
+            if not daily_load.fits(meetings, building):
+                continue
+
+            occupied |= mask
+            daily_load.add(meetings, building)
+            selected.append(i)
+            total_credits += int(self.catalog.credits[i])
+
+        return selected
+
+    @timed('summary')
     def get_schedule_summary(self, schedule: Schedule) -> Dict:
         """Generate a summary of the recommended schedule"""
+        courses = []
+        for course in schedule.courses:
+            display = self.catalog.display_of(course)
+            courses.append({
+                "course_id": course.course_id,
+                "course_name": course.course_name,
+                "time": display.time,
+                "days": course.days,
+                "meetings": [
+                    {"day": day, "start": start, "end": end}
+                    for day, _, start, end in display.meetings
+                ],
+                "location": display.location
+            })
         return {
             "total_credits": schedule.total_credits,
-            "courses": [
-                {
-                    "course_id": course.course_id,
-                    "course_name": course.course_name,
-                    "time": course.time_slot.strftime("%I:%M %p"),
-                    "days": course.days,
-                    "location": f"{course.building} {course.room}"
-                }
-                for course in schedule.courses
-            ],
+            "courses": courses,
             "daily_schedule": self._generate_daily_schedule(schedule)
         }
 
     def _generate_daily_schedule(self, schedule: Schedule) -> Dict:
-        """Generate a daily schedule view"""
-        daily_schedule = {}
-        for course in schedule.courses:
-            for day in course.days:
-                if day not in daily_schedule:
-                    daily_schedule[day] = []
-                daily_schedule[day].append({
-                    "course": course.course_name,
-                    "time": course.time_slot.strftime("%I:%M %p"),
-                    "location": f"{course.building} {course.room}"
-                })
-        return daily_schedule 
\ No newline at end of file
+        """Generate a daily schedule view with each day's meetings in start time order"""
+        return schedule.daily_schedule(self.catalog.display_of)
+
+
+# Recommender shared by all batches handled in a worker process
+_worker_recommender: Optional[ClassRecommender] = None
+
+
+def _init_worker(recommender: ClassRecommender):
+    global _worker_recommender
+    _worker_recommender = recommender
+
+
+def _recommend_chunk_in_worker(preferences_list: List[StudentPreferences], required_credits: int) -> List[List[Course]]:
+    return _worker_recommender._recommend_chunk(preferences_list, required_credits)
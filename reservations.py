@@ -0,0 +1,161 @@
+import heapq
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from models import Course
+import numpy as np
+
+
+@dataclass(frozen=True)
+class Reservation:
+    """Seats tentatively held for a student while they review a schedule"""
+    reservation_id: int
+    student_id: str
+    rows: Tuple[int, ...]  # catalog rows of the held courses
+    expires: float  # time.monotonic() deadline
+
+
+class SeatReservations:
+    """Thread-safe tentative seat holds on top of a ClassRecommender's catalog.
+
+    Held seats are counted per catalog row and guarded by striped locks, so
+    students holding different courses rarely wait on each other. A hold
+    covers all of a schedule's courses or none of them, and expires after
+    its ttl unless it is confirmed (turned into enrollment) or released.
+
+    While attached, scoring counts held seats as taken, recommendations and
+    schedule searches skip courses with no seat left, and enrollment changes
+    from elsewhere (see ClassRecommender.apply_enrollment_deltas) take the
+    same locks as holds so a seat can't be both held and enrolled.
+    """
+
+    def __init__(self, recommender, ttl: float = 600.0, stripes: int = 64):
+        self.recommender = recommender
+        self.catalog = recommender.catalog
+        self.ttl = ttl
+        self.held = np.zeros(len(self.catalog), dtype=np.int32)
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+        self._lock = threading.Lock()  # guards the reservation registry and expiry heap
+        self._reservations: Dict[int, Reservation] = {}
+        self._expiry: List[Tuple[float, int]] = []
+        self._ids = itertools.count(1)
+        self.catalog.held = self.held
+        recommender.reservations = self
+
+    def _row(self, course: Union[Course, str]) -> Optional[int]:
+        course_id = course if isinstance(course, str) else course.course_id
+        return self.catalog.row_of(course_id)
+
+    def _locks(self, rows: Iterable[int]) -> List[threading.Lock]:
+        # Always acquired in stripe order, so two multi-course holds cannot deadlock
+        return [self._stripes[stripe] for stripe in sorted({row % len(self._stripes) for row in rows})]
+
+    def seats_left(self, row: int) -> int:
+        """Open seats in a course once enrollment and current holds are taken out"""
+        capacity = int(self.catalog.capacity[row])
+        # Same clamp as CourseCatalog.taken
+        return capacity - min(max(int(self.catalog.enrolled[row]), 0), capacity) - int(self.held[row])
+
+    def hold(self, student_id: str, courses: Iterable[Union[Course, str]],
+             ttl: Optional[float] = None) -> Optional[Reservation]:
+        """Hold one seat in each course, or none when any of them has no seat left.
+
+        Returns the reservation, or None when a course is full or unknown.
+        """
+        self.purge_expired()
+        rows = [self._row(course) for course in courses]
+        if not rows or None in rows:
+            return None
+        rows = tuple(dict.fromkeys(rows))
+
+        locks = self._locks(rows)
+        for lock in locks:
+            lock.acquire()
+        try:
+            if any(self.seats_left(row) < 1 for row in rows):
+                return None
+            for row in rows:
+                self.held[row] += 1
+            # Held seats change scores, so cached recommendations that depend on these rows are stale
+            self.catalog.bump_version(np.array(rows))
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+        reservation = Reservation(next(self._ids), student_id, rows,
+                                  time.monotonic() + (self.ttl if ttl is None else ttl))
+        with self._lock:
+            self._reservations[reservation.reservation_id] = reservation
+            heapq.heappush(self._expiry, (reservation.expires, reservation.reservation_id))
+        return reservation
+
+    def _take(self, reservation_id: int) -> Optional[Reservation]:
+        """Remove a reservation from the registry, returning it if it was still active"""
+        with self._lock:
+            return self._reservations.pop(reservation_id, None)
+
+    def _unhold(self, rows: Tuple[int, ...], enroll: bool = False):
+        locks = self._locks(rows)
+        for lock in locks:
+            lock.acquire()
+        try:
+            for row in rows:
+                self.held[row] -= 1
+            self.catalog.bump_version(np.array(rows))
+            if enroll:
+                # Still under the locks, so the seats never look free in between
+                self.recommender._update_enrollment(np.array(rows), np.ones(len(rows), dtype=np.int64))
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def apply_enrollment(self, rows: np.ndarray, deltas: np.ndarray) -> np.ndarray:
+        """Apply enrollment deltas to catalog rows under their stripe locks, returning the rows changed"""
+        locks = self._locks(rows.tolist())
+        for lock in locks:
+            lock.acquire()
+        try:
+            return self.recommender._update_enrollment(rows, deltas)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def release(self, reservation_id: int) -> bool:
+        """Give the seats of a reservation back; False if it already expired or was used"""
+        reservation = self._take(reservation_id)
+        if reservation is None:
+            return False
+        self._unhold(reservation.rows)
+        return True
+
+    def confirm(self, reservation_id: int) -> bool:
+        """Turn the held seats into enrollment; False if the reservation already expired or was used"""
+        reservation = self._take(reservation_id)
+        if reservation is None:
+            return False
+        self._unhold(reservation.rows, enroll=True)
+        return True
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """Release every reservation past its expiry, returning how many were released"""
+        now = time.monotonic() if now is None else now
+        # Unlocked peek, so the common case of nothing to expire costs no lock
+        if not self._expiry or self._expiry[0][0] > now:
+            return 0
+        expired = []
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                _, reservation_id = heapq.heappop(self._expiry)
+                reservation = self._reservations.pop(reservation_id, None)
+                if reservation is not None:
+                    expired.append(reservation)
+        for reservation in expired:
+            self._unhold(reservation.rows)
+        return len(expired)
+
+    def active(self) -> int:
+        """Number of reservations currently holding seats"""
+        with self._lock:
+            return len(self._reservations)
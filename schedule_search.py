@@ -0,0 +1,124 @@
+import heapq
+from bisect import bisect_right
+from time import perf_counter
+from typing import List, Optional, Tuple
+from models import StudentPreferences
+from catalog import CourseCatalog
+from constraints import DailyLoad
+from instrumentation import timed
+from ranking import top_k_order
+import numpy as np
+
+
+class ScheduleSearch:
+    """Branch-and-bound search for the highest scoring complete schedules.
+
+    Candidates are explored in order of score per credit, and a branch is
+    cut as soon as a fractional-knapsack upper bound on its total score
+    cannot beat the k-th best schedule found so far. The search is anytime:
+    when the time limit runs out it returns the best schedules found.
+
+    Only the max_candidates courses with the best score per credit are
+    searched (None searches every course), so results are exact only when
+    neither that limit nor the time limit cuts the search short.
+    """
+
+    def __init__(self, catalog: CourseCatalog, scores: np.ndarray, preferences: StudentPreferences,
+                 required_credits: int, max_credits: Optional[int] = None, top_k: int = 5,
+                 max_candidates: Optional[int] = 300, time_limit: float = 0.05, travel: Optional[np.ndarray] = None):
+        self.catalog = catalog
+        self.required_credits = required_credits
+        self.max_credits = max(max_credits or required_credits, required_credits)
+        self.top_k = top_k
+        self.time_limit = time_limit
+        self.load = DailyLoad(preferences.max_classes_per_day, preferences.min_gap_between_classes,
+                              travel, preferences.max_commute_time)
+
+        # Keep the most promising candidates, ordered by score per credit
+        credits = catalog.credits
+        usable = (credits > 0) & (credits <= self.max_credits)
+        if catalog.held is not None:
+            # Skip courses whose remaining seats are all held by other students, as the greedy selection does
+            usable &= catalog.capacity - catalog.taken() >= 1
+        usable = np.flatnonzero(usable)
+        density = scores[usable] / credits[usable]
+        order = top_k_order(density, len(usable) if max_candidates is None else max_candidates)
+        self.candidates = usable[order].tolist()
+        self.scores = scores[self.candidates].tolist()
+        self.credits = credits[self.candidates].tolist()
+        self.buildings = catalog.building_codes[self.candidates].tolist()
+        self.density = density[order].tolist()
+
+        # Prefix sums for O(log n) fractional-knapsack bounds
+        self.cum_credits = [0]
+        self.cum_scores = [0.0]
+        for score, credit in zip(self.scores, self.credits):
+            self.cum_credits.append(self.cum_credits[-1] + credit)
+            self.cum_scores.append(self.cum_scores[-1] + score)
+
+        self.best: List[Tuple[float, Tuple[int, ...]]] = []
+        self.timed_out = False
+
+    @timed('search')
+    def run(self) -> List[Tuple[float, List[int]]]:
+        """Return up to top_k (total score, catalog indices) pairs, best first"""
+        self._deadline = perf_counter() + self.time_limit
+        self._nodes = 0
+        self._chosen: List[int] = []
+        self._search(0, 0, 0.0, 0)
+        return [
+            (score, [self.candidates[j] for j in chosen])
+            for score, chosen in sorted(self.best, reverse=True)
+        ]
+
+    def _bound(self, start: int, capacity: int) -> float:
+        """Upper bound on the score obtainable from candidates[start:] within the credit capacity"""
+        limit = self.cum_credits[start] + capacity
+        end = bisect_right(self.cum_credits, limit) - 1
+        bound = self.cum_scores[end] - self.cum_scores[start]
+        if end < len(self.candidates):
+            bound += (limit - self.cum_credits[end]) * self.density[end]
+        return bound
+
+    def _threshold(self) -> float:
+        return self.best[0][0] if len(self.best) >= self.top_k else float('-inf')
+
+    def _search(self, start: int, credits: int, score: float, occupied: int):
+        capacity = self.max_credits - credits
+        for j in range(start, len(self.candidates)):
+            if score + self._bound(j, capacity) <= self._threshold():
+                break
+
+            self._nodes += 1
+            if self._nodes & 255 == 0 and perf_counter() > self._deadline:
+                self.timed_out = True
+            if self.timed_out:
+                return
+
+            credit = self.credits[j]
+            if credit > capacity:
+                continue
+            index = self.candidates[j]
+            mask = self.catalog.time_masks[index]
+            meetings = self.catalog.meetings[index]
+            building = self.buildings[j]
+            if occupied & mask or not self.load.fits(meetings, building):
+                continue
+
+            self._chosen.append(j)
+            self.load.add(meetings, building)
+            new_credits = credits + credit
+            new_score = score + self.scores[j]
+            if new_credits >= self.required_credits:
+                self._record(new_score)
+            if new_credits < self.max_credits:
+                self._search(j + 1, new_credits, new_score, occupied | mask)
+            self.load.remove(meetings)
+            self._chosen.pop()
+
+    def _record(self, score: float):
+        entry = (score, tuple(self._chosen))
+        if len(self.best) < self.top_k:
+            heapq.heappush(self.best, entry)
+        elif entry > self.best[0]:
+            heapq.heapreplace(self.best, entry)
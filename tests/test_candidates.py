@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from recommender import ClassRecommender
+from reservations import SeatReservations
+from benchmarks.synthetic import campus_names, generate_courses, generate_students, subject_names
+
+
+def recommend_both_ways(recommender, preferences, required_credits):
+    return (recommender.recommend_courses(preferences, required_credits),
+            recommender.recommend_courses(preferences, required_credits, full_scan=True))
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_ranked_rows_match_full_catalog_ranking(seed):
+    recommender = ClassRecommender(generate_courses(800, subjects=12, seed=seed))
+    for preferences in generate_students(10, subject_names(12), campus_names(3), seed=seed):
+        scores = recommender.catalog.score(preferences)
+        ranked = list(recommender.candidates.ranked_rows(preferences))
+        assert ranked == np.argsort(-scores, kind='stable').tolist()
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_pruned_recommendations_identical_to_full_scan(seed):
+    courses = generate_courses(3000, seed=seed)
+    recommender = ClassRecommender(courses)
+    recommender.result_cache = None
+    students = generate_students(40, subject_names(40), campus_names(3), seed=seed)
+    for preferences in students:
+        pruned, full = recommend_both_ways(recommender, preferences, 12)
+        assert pruned == full
+
+    # Availability changes must reach the cell bounds
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(courses), 2000)
+    recommender.apply_enrollment_deltas([(courses[row].course_id, int(delta)) for row, delta
+                                         in zip(rows, rng.integers(-40, 40, len(rows)))])
+    reservations = SeatReservations(recommender)
+    for i, preferences in enumerate(students):
+        pruned, full = recommend_both_ways(recommender, preferences, 12)
+        assert pruned == full
+        reservations.hold(f'student-{i}', pruned)
@@ -0,0 +1,32 @@
+from models import StudentPreferences
+from recommender import ClassRecommender
+from benchmarks.synthetic import generate_courses
+
+NO_PREFERENCES = StudentPreferences(max_commute_time=0, preferred_time_slots=[], preferred_days=[],
+                                    max_classes_per_day=3, preferred_subjects=[], min_gap_between_classes=0)
+
+
+def test_enrollment_deltas_are_kept_past_capacity():
+    courses = generate_courses(50, seed=0)
+    recommender = ClassRecommender(courses)
+    course = courses[0]
+    start = course.enrolled
+
+    assert recommender.apply_enrollment(course.course_id, course.capacity)
+    assert course.enrolled == start + course.capacity
+    assert recommender.catalog.availability()[0] == 0.0
+    # Dropping the same students gets back to the starting count
+    assert recommender.apply_enrollment(course.course_id, -course.capacity)
+    assert course.enrolled == start
+
+    assert recommender.apply_enrollment(course.course_id, -start - 5)
+    assert course.enrolled == -5
+    assert recommender.catalog.availability()[0] == 1.0
+    assert recommender.calculate_course_score(course, NO_PREFERENCES) == 2.0
+
+
+def test_apply_enrollment_without_change():
+    courses = generate_courses(5, seed=0)
+    recommender = ClassRecommender(courses)
+    assert not recommender.apply_enrollment(courses[0].course_id, 0)
+    assert not recommender.apply_enrollment('NO-SUCH-COURSE', 1)
@@ -0,0 +1,56 @@
+import random
+from recommender import ClassRecommender
+from reservations import SeatReservations
+from enrollment_stream import ReplayEnrollmentStream
+from benchmarks.synthetic import campus_names, generate_courses, generate_students, subject_names
+
+
+def test_cached_recommendations_follow_enrollment_and_holds():
+    courses = generate_courses(3000, seed=0)
+    recommender = ClassRecommender(courses)
+    reference = ClassRecommender(courses, recommender.catalog)
+    reference.result_cache = None
+    reservations = SeatReservations(recommender)
+    students = generate_students(30, subject_names(40), campus_names(3), seed=1)
+    stream = ReplayEnrollmentStream.synthetic([course.course_id for course in courses], 600, seed=2)
+
+    rng = random.Random(3)
+    for i, event in enumerate(stream):
+        recommender.apply_enrollment_deltas([(event.course_id, event.delta)])
+        preferences = rng.choice(students)
+        recommended = recommender.recommend_courses(preferences, 12)
+        assert recommended == reference.recommend_courses(preferences, 12)
+        if i % 50 == 0:
+            reservations.hold(f'student-{i}', recommended)
+    assert recommender.result_cache.hits > 0
+
+
+def test_only_entries_depending_on_changed_rows_are_dropped():
+    courses = generate_courses(3000, seed=0)
+    recommender = ClassRecommender(courses)
+    preferences = generate_students(1, subject_names(40), campus_names(3), seed=1)[0]
+    recommended = recommender.recommend_courses(preferences, 12)
+
+    _, floor = recommender._recommend(preferences, 12, False, False)
+    reaching = set(recommender.candidates.cells_reaching(preferences, floor).tolist())
+    unrelated = next(course for row, course in enumerate(courses)
+                     if int(recommender.candidates.cell_of[row]) not in reaching)
+    recommender.apply_enrollment(unrelated.course_id, -5)
+    assert recommender.recommend_courses(preferences, 12) == recommended
+    assert recommender.result_cache.hits == 1
+
+    recommender.apply_enrollment(recommended[0].course_id, 1)
+    recommender.recommend_courses(preferences, 12)
+    assert recommender.result_cache.hits == 1
+
+
+def test_changes_through_a_shared_catalog_reach_every_cache():
+    courses = generate_courses(500, seed=0)
+    first = ClassRecommender(courses)
+    second = ClassRecommender(courses, first.catalog)
+    preferences = generate_students(1, subject_names(40), campus_names(3), seed=1)[0]
+    recommended = second.recommend_courses(preferences, 12)
+
+    first.apply_enrollment(recommended[0].course_id, recommended[0].capacity)
+    assert second.recommend_courses(preferences, 12) == first.recommend_courses(preferences, 12, full_scan=True)
+    assert second.result_cache.hits == 0
@@ -0,0 +1,42 @@
+import dataclasses
+import json
+import pickle
+import random
+from models import Schedule
+from recommender import ClassRecommender
+from benchmarks.synthetic import generate_courses
+
+
+def rebuilt_daily_schedule(schedule):
+    return Schedule(schedule.student_id, list(schedule.courses), 0, 0).daily_schedule()
+
+
+def test_summary_is_plain_data():
+    courses = generate_courses(20, seed=0)
+    recommender = ClassRecommender(courses)
+    schedule = Schedule('s1', courses[:4], sum(course.credits for course in courses[:4]), 0)
+    summary = recommender.get_schedule_summary(schedule)
+
+    assert json.loads(json.dumps(summary)) == summary
+    assert dataclasses.asdict(schedule)['courses'][0]['course_id'] == courses[0].course_id
+    # Changing a returned summary leaves the schedule's own view alone
+    next(iter(summary['daily_schedule'].values())).clear()
+    assert recommender.get_schedule_summary(schedule) != summary
+
+
+def test_incremental_edits_match_a_rebuilt_view():
+    courses = generate_courses(60, seed=1)
+    schedule = Schedule('s1', list(courses[:5]), sum(course.credits for course in courses[:5]), 0)
+    schedule.daily_schedule()
+    rng = random.Random(0)
+    for _ in range(40):
+        if schedule.courses and rng.random() < 0.5:
+            schedule.remove_course(rng.choice(schedule.courses))
+        else:
+            schedule.add_course(rng.choice(courses))
+        assert schedule.daily_schedule() == rebuilt_daily_schedule(schedule)
+        assert schedule.total_credits == sum(course.credits for course in schedule.courses)
+
+    copy = pickle.loads(pickle.dumps(schedule))
+    assert copy == schedule
+    assert copy.daily_schedule() == schedule.daily_schedule()
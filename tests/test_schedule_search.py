@@ -0,0 +1,38 @@
+from itertools import combinations
+import pytest
+from constraints import DailyLoad
+from recommender import ClassRecommender
+from benchmarks.synthetic import campus_names, generate_courses, generate_students, subject_names
+
+
+def brute_force(recommender, preferences, required_credits, max_credits, top_k):
+    """Total scores of the top_k valid schedules, found by trying every subset of the catalog"""
+    catalog = recommender.catalog
+    scores = recommender.score_courses(preferences)
+    totals = []
+    for size in range(1, len(catalog) + 1):
+        for rows in combinations(range(len(catalog)), size):
+            credits = sum(int(catalog.credits[i]) for i in rows)
+            if not required_credits <= credits <= max_credits:
+                continue
+            occupied = 0
+            load = DailyLoad(preferences.max_classes_per_day, preferences.min_gap_between_classes)
+            for i in rows:
+                if occupied & catalog.time_masks[i] or not load.fits(catalog.meetings[i]):
+                    break
+                occupied |= catalog.time_masks[i]
+                load.add(catalog.meetings[i])
+            else:
+                totals.append(sum(float(scores[i]) for i in rows))
+    return sorted(totals, reverse=True)[:top_k]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_search_matches_brute_force_without_limits(seed):
+    courses = generate_courses(12, subjects=4, campuses=2, seed=seed)
+    recommender = ClassRecommender(courses)
+    for preferences in generate_students(3, subject_names(4), campus_names(2), seed=seed):
+        found = recommender.search_schedules(preferences, 6, top_k=3, max_credits=8, time_limit=10.0,
+                                             max_candidates=None)
+        expected = brute_force(recommender, preferences, 6, 8, 3)
+        assert [score for score, _ in found] == pytest.approx(expected)